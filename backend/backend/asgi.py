@@ -8,6 +8,7 @@ import matchmaking.routing
 import gameplay.routing
 
 from users.middleware.auth_middleware import JWTAuthenticationMiddleware
+from gameplay.middleware.deadline_sweep_middleware import DeadlineSweepMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
@@ -17,7 +18,7 @@ gameplay_api_urls = gameplay.routing.websocket_urlpatterns
 
 websocket_routes = users_api_urls + matchmaking_api_urls + gameplay_api_urls
 
-application = ProtocolTypeRouter({
+application = DeadlineSweepMiddleware(ProtocolTypeRouter({
 	"http": get_asgi_application(),
 	"websocket": JWTAuthenticationMiddleware(URLRouter(websocket_routes))
-})
+}))
@@ -123,6 +123,16 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # SQLite has no row locks, so transactions take the write lock when they begin and concurrent
+            # matchmaking ticks or game saves queue up for it instead of failing halfway through
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+            # A file rather than shared memory, so threads in the tests wait on each other's locks like processes do
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
         }
     }
 
@@ -0,0 +1,755 @@
+import asyncio
+import logging
+
+from decimal import Decimal
+from datetime import timedelta
+from time import monotonic, time
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+
+from django.db import transaction
+from django.utils import timezone
+
+from move_validation.utils.move_validation import validate_move
+from move_validation.utils.get_move_type import get_encoded_move_type
+from move_validation.utils.result_detection import evaluate_game_state
+from move_validation.utils.position import Position, color_names
+from move_validation.utils.move_generation import get_move_from_move_info
+from move_validation.utils.zobrist import format_zobrist_hash
+
+from .models import ChessGame, GameMove
+from .utils.algebraic_notation_parser import get_move_algebraic_notation
+from .utils.position_history import is_keyframe_ply
+from .timer_scheduler import timer_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Longest a move stays only in memory before it is written to the database
+FLUSH_DELAY = 2
+
+# How long a live game may have no connected players before it is ended
+ABANDONMENT_TIMEOUT = 60
+
+# Columns a session owns while it is live
+persisted_fields = ChessGame.move_state_fields + ["game_status", "game_result", "is_timer_running", "flag_deadline"]
+
+# How often the database is checked for games whose deadline passed while no process was tracking them
+DEADLINE_SWEEP_INTERVAL = 30
+
+# A game whose session heartbeat is older than this has no live owner and is left to the deadline sweep;
+# every sweep refreshes the heartbeat of the games its process holds
+SESSION_HEARTBEAT_TIMEOUT = 3 * DEADLINE_SWEEP_INTERVAL
+
+# One session per live game, shared by every connection to that game in this process
+game_sessions = {}
+# Held while a game's session is loaded, so connects to other games never wait on its query
+game_session_locks = {}
+
+def get_clock_milliseconds(clock_seconds) -> int:
+	return int(Decimal(clock_seconds) * 1000)
+
+def get_clock_seconds(clock_milliseconds: int) -> Decimal:
+	return (Decimal(clock_milliseconds) / 1000).quantize(Decimal("0.1"))
+
+def calculate_position_index(piece_color: str, move_number: int):
+	if piece_color.lower() == "white":
+		return (move_number - 1) * 2 + 1
+	else:
+		return (move_number - 1) * 2 + 2
+
+# Players are joined in so later username checks never go back to the database
+def sync_load_chess_game(game_id) -> tuple[ChessGame, list]:
+	chess_game = ChessGame.objects.select_related("white_player", "black_player").get(id=game_id)
+	position_hashes = chess_game.sync_get_recent_position_hashes(chess_game.halfmove_clock + 1)
+
+	return chess_game, position_hashes
+
+@database_sync_to_async
+def async_load_chess_game(game_id) -> tuple[ChessGame, list]:
+	return sync_load_chess_game(game_id)
+
+# Claimed before reading so neither a sweep nor another process's session can change the game under the new one
+@database_sync_to_async
+def async_claim_game_session(game_id, session_owner) -> str:
+	now = timezone.now()
+
+	return ChessGame.sync_claim_session(game_id, session_owner, now, get_heartbeat_cutoff(now))
+
+@database_sync_to_async
+def async_release_session_ownership(game_id, session_owner):
+	ChessGame.sync_release_session(game_id, session_owner)
+
+# A game has one authoritative session across all processes; the others get a RemoteGameSession forwarding to it
+async def get_game_session(game_id) -> "GameSession | RemoteGameSession":
+	game_id = int(game_id)
+	game_session = game_sessions.get(game_id)
+
+	if game_session is not None:
+		return game_session
+
+	session_owner = await session_owner_channel.get_name()
+	game_session_lock = game_session_locks.setdefault(game_id, asyncio.Lock())
+
+	async with game_session_lock:
+		game_session = game_sessions.get(game_id)
+
+		if game_session is None:
+			game_session = await load_game_session(game_id, session_owner)
+
+	# Only a session this process holds keeps its lock, release_game_session drops it
+	if game_id not in game_sessions and not game_session_lock.locked():
+		game_session_locks.pop(game_id, None)
+
+	return game_session
+
+async def load_game_session(game_id, session_owner) -> "GameSession | RemoteGameSession":
+	claimed_session_owner = await async_claim_game_session(game_id, session_owner)
+
+	if claimed_session_owner != session_owner:
+		return RemoteGameSession(game_id, claimed_session_owner)
+
+	chess_game, position_hashes = await async_load_chess_game(game_id)
+
+	game_session = GameSession(chess_game, position_hashes)
+	game_sessions[game_id] = game_session
+
+	return game_session
+
+async def release_game_session(game_id):
+	game_id = int(game_id)
+	game_session = game_sessions.pop(game_id, None)
+
+	# A lock someone is loading under stays, so a second load cannot start beside it
+	game_session_lock = game_session_locks.get(game_id)
+
+	if game_session_lock is not None and not game_session_lock.locked():
+		del game_session_locks[game_id]
+
+	if game_session:
+		await game_session.close()
+
+def get_heartbeat_cutoff(now):
+	return now - timedelta(seconds=SESSION_HEARTBEAT_TIMEOUT)
+
+@database_sync_to_async
+def refresh_session_heartbeats(game_ids):
+	ChessGame.sync_refresh_session_heartbeats(game_ids, timezone.now(), session_owner_channel.name)
+
+@database_sync_to_async
+def adjudicate_expired_games(excluded_game_ids, game_ids=None) -> list:
+	now = timezone.now()
+
+	return ChessGame.sync_adjudicate_expired_games(now, get_heartbeat_cutoff(now), excluded_game_ids, game_ids)
+
+@database_sync_to_async
+def get_live_game_deadlines(excluded_game_ids) -> list:
+	return ChessGame.sync_get_live_game_deadlines(get_heartbeat_cutoff(timezone.now()), excluded_game_ids)
+
+async def broadcast_expired_games(expired_games: list):
+	channel_layer = get_channel_layer()
+
+	for game_id, timeout_color, white_player_clock, black_player_clock in expired_games:
+		await channel_layer.group_send(f"game_{game_id}", {
+			"type": "player_timeout",
+			"timeout_color": timeout_color,
+			"white_player_clock": 0 if timeout_color == "white" else float(white_player_clock),
+			"black_player_clock": 0 if timeout_color == "black" else float(black_player_clock),
+			"side_to_move": timeout_color,
+			"is_clock_running": False,
+			"server_time": time() * 1000
+		})
+
+# Adjudicated straight in the database; if a process took the game over meanwhile, its own session handles the flag
+async def recover_flag_deadline(game_id):
+	if game_id in game_sessions:
+		return
+
+	await broadcast_expired_games(await adjudicate_expired_games(list(game_sessions), [game_id]))
+
+# Ends games that ran out of time while no process held them and re-arms flag timers for the ones still live
+async def sweep_game_deadlines():
+	timer_scheduler.schedule(None, "deadline_sweep", monotonic() + DEADLINE_SWEEP_INTERVAL, sweep_game_deadlines)
+
+	loaded_game_ids = list(game_sessions)
+
+	if loaded_game_ids:
+		await refresh_session_heartbeats(loaded_game_ids)
+
+	await broadcast_expired_games(await adjudicate_expired_games(loaded_game_ids))
+
+	now = timezone.now()
+
+	for game_id, flag_deadline in await get_live_game_deadlines(loaded_game_ids):
+		if timer_scheduler.is_scheduled(game_id, "flag"):
+			continue
+
+		deadline = monotonic() + (flag_deadline - now).total_seconds()
+		timer_scheduler.schedule(game_id, "flag", deadline, lambda game_id=game_id: recover_flag_deadline(game_id))
+
+def start_deadline_sweep():
+	if not timer_scheduler.is_scheduled(None, "deadline_sweep"):
+		timer_scheduler.schedule(None, "deadline_sweep", monotonic(), sweep_game_deadlines)
+
+def is_held_elsewhere(chess_game: ChessGame) -> bool:
+	if chess_game.session_owner in (None, session_owner_channel.name) or chess_game.session_heartbeat is None:
+		return False
+
+	return chess_game.session_heartbeat >= get_heartbeat_cutoff(timezone.now())
+
+async def end_game(game_id, chess_game: ChessGame, game_result: str):
+	game_session = game_sessions.get(int(game_id))
+
+	if game_session:
+		await game_session.end_game(game_result)
+	elif is_held_elsewhere(chess_game):
+		await RemoteGameSession(chess_game.id, chess_game.session_owner).end_game(game_result)
+	else:
+		await chess_game.async_end_game(game_result)
+
+class GameSession:
+	def __init__(self, chess_game: ChessGame, position_hashes: list):
+		self.game_id = chess_game.id
+		self.room_group_name = f"game_{chess_game.id}"
+		self.chess_game = chess_game
+
+		self.white_player_username = chess_game.white_player.username
+		self.black_player_username = chess_game.black_player.username
+
+		self.position = Position.from_parsed_fen(chess_game.sync_get_full_parsed_fen(), chess_game.current_player_turn)
+		self.position_hashes = position_hashes
+
+		# Remaining time per colour as of turn_started_at, which is a monotonic timestamp taken when the side
+		# to move started thinking; the time they have used is only subtracted once they move or flag
+		self.clock_milliseconds = {
+			"white": get_clock_milliseconds(chess_game.white_player_clock),
+			"black": get_clock_milliseconds(chess_game.black_player_clock)
+		}
+		self.turn_started_at = monotonic() if chess_game.is_timer_running else None
+
+		# The saved clock is from the last move, so the side to move is resumed from the deadline instead
+		if self.turn_started_at is not None and chess_game.flag_deadline is not None:
+			remaining_milliseconds = int((chess_game.flag_deadline - timezone.now()).total_seconds() * 1000)
+			self.clock_milliseconds[self.side_to_move] = max(remaining_milliseconds, 0)
+
+		self.connection_count = 0
+
+		# Set once another process has taken the game over, after which this session accepts no more moves
+		self.is_superseded = False
+
+		# Moves are applied one at a time in arrival order
+		self.move_queue = asyncio.Queue()
+		self.move_processor = None
+
+		self.pending_game_moves = []
+		self.flush_task = None
+		self.flush_lock = asyncio.Lock()
+
+		self.schedule_clock_timers()
+
+	@property
+	def is_ongoing(self) -> bool:
+		return self.chess_game.game_status == "Ongoing"
+
+	@property
+	def side_to_move(self) -> str:
+		return self.chess_game.current_player_turn.lower()
+
+	def get_player_username(self, color: str):
+		return self.white_player_username if color.lower() == "white" else self.black_player_username
+
+	def get_remaining_milliseconds(self, color: str, now: float = None) -> int:
+		remaining_milliseconds = self.clock_milliseconds[color]
+
+		if self.turn_started_at is not None and color == self.side_to_move and self.is_ongoing:
+			now = monotonic() if now is None else now
+			remaining_milliseconds -= int((now - self.turn_started_at) * 1000)
+
+		return max(remaining_milliseconds, 0)
+
+	@property
+	def is_clock_running(self) -> bool:
+		return self.turn_started_at is not None and self.is_ongoing
+
+	# Clients count down from this themselves, using server_time and their estimated clock offset
+	def get_clock_state(self, now: float = None) -> dict:
+		now = monotonic() if now is None else now
+
+		return {
+			"white_player_clock": self.get_remaining_milliseconds("white", now) / 1000,
+			"black_player_clock": self.get_remaining_milliseconds("black", now) / 1000,
+			"side_to_move": self.side_to_move,
+			"is_clock_running": self.is_clock_running,
+			"server_time": (time() - (monotonic() - now)) * 1000
+		}
+
+	# Monotonic time at which the side to move runs out, or None while the clock is stopped
+	def get_flag_deadline(self):
+		if self.turn_started_at is None or not self.is_ongoing:
+			return None
+
+		return self.turn_started_at + self.clock_milliseconds[self.side_to_move] / 1000
+
+	# Runs once per move on the process holding the session; the whole group receives the computed events
+	async def handle_move(self, move_info: dict, move_made_by):
+		move_events = await self.submit_move(move_info, move_made_by)
+
+		if move_events:
+			await self.broadcast({
+				"type": "move_processed",
+				"move_events": move_events
+			})
+
+	async def submit_move(self, move_info: dict, move_made_by) -> list:
+		if self.move_processor is None:
+			self.move_processor = asyncio.create_task(self.process_moves())
+
+		move_result = asyncio.get_running_loop().create_future()
+		await self.move_queue.put((move_info, move_made_by, move_result))
+
+		return await move_result
+
+	async def process_moves(self):
+		while True:
+			move_info, move_made_by, move_result = await self.move_queue.get()
+
+			try:
+				move_events = self.apply_move(move_info, move_made_by)
+
+				# A finished game is written straight away, anything else within FLUSH_DELAY
+				if move_events and not self.is_ongoing:
+					await self.flush()
+				elif move_events:
+					self.schedule_flush()
+			except Exception as error:
+				move_result.set_exception(error)
+			else:
+				move_result.set_result(move_events)
+
+	def apply_move(self, move_info: dict, move_made_by) -> list:
+		chess_game = self.chess_game
+		piece_color = move_info["piece_color"].lower()
+
+		if self.is_superseded or not self.is_ongoing or chess_game.current_player_turn.lower() != piece_color:
+			return []
+
+		if move_made_by != self.get_player_username(piece_color):
+			return []
+
+		if not validate_move(self.position, move_info):
+			return []
+
+		now = monotonic()
+
+		# A move that arrives after the deadline loses on time even if the flag has not been handled yet
+		if self.get_remaining_milliseconds(piece_color, now) <= 0:
+			self.flag(piece_color)
+
+			return [{
+				"type": "player_timeout",
+				"timeout_color": piece_color,
+				**self.get_clock_state(now)
+			}]
+
+		ply = calculate_position_index(piece_color, chess_game.current_move)
+
+		move = get_move_from_move_info(self.position, move_info)
+		algebraic_notation = get_move_algebraic_notation(self.position, move)
+
+		self.position.make_move(move)
+		self.position.undo_stack.clear()
+
+		self.stop_clock(piece_color, now)
+		self.update_chess_game()
+		self.schedule_clock_timers()
+
+		resulting_fen = chess_game.sync_get_full_parsed_fen()
+
+		self.position_hashes.append(self.position.zobrist_hash)
+		del self.position_hashes[:-(self.position.halfmove_clock + 1)]
+
+		# One evaluation after the move settles both the check in the notation and the game result
+		game_state = evaluate_game_state(self.position, self.position_hashes)
+		move_type = get_encoded_move_type(move, game_state.is_check, move_info)
+
+		if game_state.is_check:
+			algebraic_notation += "+"
+
+		self.pending_game_moves.append(GameMove(
+			chess_game=chess_game,
+			ply=ply,
+			encoded_move=move,
+			algebraic_notation=algebraic_notation,
+			move_type=move_type,
+			resulting_fen=resulting_fen if is_keyframe_ply(ply) else None,
+			zobrist_hash=format_zobrist_hash(self.position.zobrist_hash),
+			white_player_clock=chess_game.white_player_clock,
+			black_player_clock=chess_game.black_player_clock
+		))
+
+		move_events = [{
+			"type": "move_applied",
+			"ply": ply,
+			"move_data": move_info,
+			"move_type": move_type,
+			"algebraic_notation": algebraic_notation,
+			"new_parsed_fen": resulting_fen,
+			"last_dragged_square": str(move_info["starting_square"]),
+			"last_dropped_square": str(move_info["destination_square"]),
+			**self.get_clock_state(now)
+		}]
+
+		if game_state.is_checkmated:
+			self.set_game_result(f"{piece_color.capitalize()} won")
+			move_events.append({
+				"type": "player_checkmated",
+				"winning_color": piece_color,
+				"winning_player": move_made_by,
+			})
+
+		elif game_state.is_stalemated:
+			self.set_game_result("Draw")
+			move_events.append({"type": "player_stalemated"})
+
+		elif game_state.is_threefold_repetition:
+			self.set_game_result("Draw")
+			move_events.append({"type": "threefold_repetition_detected"})
+
+		elif game_state.is_fifty_move_draw:
+			self.set_game_result("Draw")
+			move_events.append({"type": "50_move_rule_detected"})
+
+		elif game_state.is_insufficient_material:
+			self.set_game_result("Draw")
+			move_events.append({"type": "insufficient_material"})
+
+		return move_events
+
+	def update_chess_game(self):
+		chess_game = self.chess_game
+		position = self.position
+
+		chess_game.parsed_board_placement = position.to_board_placement()
+		chess_game.castling_rights = position.to_castling_rights()
+		chess_game.en_passant_target_square = position.en_passant_square
+		chess_game.halfmove_clock = position.halfmove_clock
+		chess_game.current_move = position.fullmove_number
+		chess_game.current_player_turn = color_names[position.side_to_move].lower()
+
+	def update_clock_fields(self):
+		self.chess_game.white_player_clock = get_clock_seconds(self.clock_milliseconds["white"])
+		self.chess_game.black_player_clock = get_clock_seconds(self.clock_milliseconds["black"])
+
+	# Charges the mover for the time used since their turn started, adds their increment and starts the opponent's turn
+	def stop_clock(self, color: str, now: float):
+		increment = self.chess_game.white_player_increment if color == "white" else self.chess_game.black_player_increment
+
+		self.clock_milliseconds[color] = self.get_remaining_milliseconds(color, now) + max(increment, 0) * 1000
+
+		if self.turn_started_at is not None:
+			self.turn_started_at = now
+
+		self.update_clock_fields()
+
+	# Flag fall for every game is driven by the shared timer scheduler
+	async def connect(self):
+		self.add_connection()
+
+		if not self.chess_game.is_timer_running:
+			await self.start_clock()
+
+	# Live games keep their session so clocks and moves stay in memory between reconnects
+	async def disconnect(self):
+		self.remove_connection()
+		await self.release_if_unattended()
+
+	# Pending moves are written first so the history read below includes them
+	async def send_snapshot(self, reply_channel: str):
+		await self.flush()
+
+		position_list, move_list = await asyncio.gather(
+			self.chess_game.async_get_position_list(),
+			self.chess_game.async_get_move_list()
+		)
+
+		await get_channel_layer().send(reply_channel, {
+			"type": "game_snapshot",
+			"ply": len(position_list) - 1,
+			"position_list": position_list,
+			"move_list": move_list,
+			**self.get_clock_state()
+		})
+
+	async def start_clock(self):
+		self.chess_game.is_timer_running = True
+		self.turn_started_at = monotonic()
+		self.schedule_clock_timers()
+		self.schedule_flush()
+
+		await self.broadcast({
+			"type": "clock_updated",
+			**self.get_clock_state()
+		})
+
+	def schedule_clock_timers(self):
+		flag_deadline = self.get_flag_deadline()
+
+		if flag_deadline is None:
+			return
+
+		self.chess_game.flag_deadline = timezone.now() + timedelta(seconds=flag_deadline - monotonic())
+		timer_scheduler.schedule(self.game_id, "flag", flag_deadline, self.handle_flag_deadline)
+
+	async def handle_flag_deadline(self):
+		timeout_color = self.side_to_move
+
+		if not self.is_ongoing:
+			return
+
+		# The deadline moved after this timer fired, so wait for the new one instead
+		if self.get_remaining_milliseconds(timeout_color) > 0:
+			self.schedule_clock_timers()
+			return
+
+		await self.handle_flag(timeout_color)
+		await self.broadcast({
+			"type": "player_timeout",
+			"timeout_color": timeout_color,
+			**self.get_clock_state()
+		})
+
+	def add_connection(self):
+		self.connection_count += 1
+		timer_scheduler.cancel(self.game_id, "abandonment")
+
+	def remove_connection(self):
+		self.connection_count -= 1
+
+		if self.connection_count <= 0 and self.is_ongoing:
+			timer_scheduler.schedule(self.game_id, "abandonment", monotonic() + ABANDONMENT_TIMEOUT, self.handle_abandonment)
+
+	async def handle_abandonment(self):
+		if self.connection_count <= 0:
+			await self.end_game("Abandoned")
+			await self.release_if_unattended()
+
+	# A game that ends with nobody connected has no disconnect left to release its session
+	async def release_if_unattended(self):
+		if self.connection_count <= 0 and not self.is_ongoing:
+			await release_game_session(self.game_id)
+
+	async def broadcast(self, event: dict):
+		await get_channel_layer().group_send(self.room_group_name, event)
+
+	def flag(self, color: str):
+		self.clock_milliseconds[color] = 0
+		self.update_clock_fields()
+		self.set_game_result("Timeout")
+
+	async def handle_flag(self, color: str):
+		if not self.is_ongoing:
+			return
+
+		self.flag(color)
+		await self.flush()
+		await self.release_if_unattended()
+
+	# Only the flag timer goes; a pending abandonment timer is left to release the session
+	def set_game_result(self, game_result: str):
+		self.chess_game.game_status = "Ended"
+		self.chess_game.game_result = game_result
+		self.chess_game.flag_deadline = None
+
+		timer_scheduler.cancel(self.game_id, "flag")
+
+	async def end_game(self, game_result: str):
+		if not self.is_ongoing:
+			return
+
+		self.set_game_result(game_result)
+		await self.flush()
+		await self.release_if_unattended()
+
+	def schedule_flush(self):
+		if self.flush_task is None or self.flush_task.done() or self.flush_task is asyncio.current_task():
+			self.flush_task = asyncio.create_task(self.flush_after_delay())
+
+	async def flush_after_delay(self):
+		await asyncio.sleep(FLUSH_DELAY)
+		await self.flush()
+
+	# A failed save keeps its moves pending and is retried after FLUSH_DELAY, the game carries on in memory meanwhile
+	async def flush(self):
+		if self.is_superseded:
+			return
+
+		async with self.flush_lock:
+			pending_game_moves = self.pending_game_moves
+			self.pending_game_moves = []
+
+			game_state = self.get_persisted_state()
+
+			try:
+				saved_state = await self.async_save_game_state(game_state, pending_game_moves)
+			except Exception:
+				logger.exception("Saving game %s failed, retrying in %s seconds", self.game_id, FLUSH_DELAY)
+
+				self.pending_game_moves = pending_game_moves + self.pending_game_moves
+				self.schedule_flush()
+
+				return
+
+			if saved_state is None:
+				self.supersede(len(pending_game_moves))
+				return
+
+			saved_game_status, saved_game_result = saved_state
+
+			if saved_game_status != "Ongoing" and self.is_ongoing:
+				self.set_game_result(saved_game_result)
+				self.chess_game.game_status = saved_game_status
+
+	# Read on the event loop so the saved row matches a single point between moves
+	def get_persisted_state(self) -> dict:
+		return {field: getattr(self.chess_game, field) for field in persisted_fields}
+
+	# The process that took the game over owns its moves from then on, so nothing this session still holds is kept
+	def supersede(self, dropped_move_count: int):
+		logger.warning("Game %s was taken over by another process, dropping %s unsaved moves", self.game_id, dropped_move_count)
+
+		self.is_superseded = True
+
+		if game_sessions.get(self.game_id) is self:
+			del game_sessions[self.game_id]
+
+		timer_scheduler.cancel(self.game_id, "flag")
+		timer_scheduler.cancel(self.game_id, "abandonment")
+
+	# One locked read of the row, then one update of it and one insert of the new moves;
+	# None when another process has claimed the game since this session loaded it
+	def sync_save_game_state(self, game_state: dict, pending_game_moves: list) -> tuple[str, str] | None:
+		with transaction.atomic():
+			saved_game_status, saved_game_result, session_owner = (
+				ChessGame.objects.select_for_update()
+				.values_list("game_status", "game_result", "session_owner")
+				.get(id=self.game_id)
+			)
+
+			if self.chess_game.session_owner is not None and session_owner != self.chess_game.session_owner:
+				return None
+
+			# The game was ended elsewhere, e.g. by another worker's deadline sweep, so that result is kept
+			if saved_game_status != "Ongoing":
+				game_state = {**game_state, "game_status": saved_game_status, "game_result": saved_game_result, "flag_deadline": None}
+
+			ChessGame.objects.filter(id=self.game_id).update(**game_state, session_heartbeat=timezone.now())
+			GameMove.objects.bulk_create(pending_game_moves)
+
+		return game_state["game_status"], game_state["game_result"]
+
+	@database_sync_to_async
+	def async_save_game_state(self, game_state: dict, pending_game_moves: list) -> tuple[str, str] | None:
+		return self.sync_save_game_state(game_state, pending_game_moves)
+
+	async def close(self):
+		if self.move_processor:
+			self.move_processor.cancel()
+
+		timer_scheduler.cancel(self.game_id, "flag")
+		timer_scheduler.cancel(self.game_id, "abandonment")
+
+		if self.flush_task and not self.flush_task.done():
+			self.flush_task.cancel()
+
+		await self.flush()
+
+		# Lets the next process to connect claim the game without waiting for the heartbeat to go stale
+		if self.chess_game.session_owner is not None and not self.is_superseded:
+			await async_release_session_ownership(self.game_id, self.chess_game.session_owner)
+
+# Stands in for a session another process holds; everything that changes the game is forwarded to that process
+class RemoteGameSession:
+	def __init__(self, game_id, session_owner: str):
+		self.game_id = game_id
+		self.session_owner = session_owner
+
+	async def forward(self, message_type: str, **message):
+		await get_channel_layer().send(self.session_owner, {
+			"type": message_type,
+			"game_id": self.game_id,
+			**message
+		})
+
+	async def connect(self):
+		await self.forward("session.connect")
+
+	async def disconnect(self):
+		await self.forward("session.disconnect")
+
+	async def handle_move(self, move_info: dict, move_made_by):
+		await self.forward("session.move", move_info=move_info, move_made_by=move_made_by)
+
+	async def send_snapshot(self, reply_channel: str):
+		await self.forward("session.snapshot", reply_channel=reply_channel)
+
+	async def end_game(self, game_result: str):
+		await self.forward("session.end_game", game_result=game_result)
+
+async def handle_forwarded_message(message: dict):
+	game_session = game_sessions.get(message["game_id"])
+
+	# Released or taken over since the sender looked the owner up; it finds the new one when its players reconnect
+	if game_session is None:
+		logger.warning("Dropped %s for game %s, which this process no longer holds", message["type"], message["game_id"])
+		return
+
+	if message["type"] == "session.connect":
+		await game_session.connect()
+	elif message["type"] == "session.disconnect":
+		await game_session.disconnect()
+	elif message["type"] == "session.move":
+		await game_session.handle_move(message["move_info"], message["move_made_by"])
+	elif message["type"] == "session.snapshot":
+		await game_session.send_snapshot(message["reply_channel"])
+	elif message["type"] == "session.end_game":
+		await game_session.end_game(message["game_result"])
+
+class SessionOwnerChannel:
+	def __init__(self):
+		self.name = None
+		self.listener = None
+
+		# Same as the timer scheduler, running handlers are kept here until they finish
+		self.message_tasks = set()
+
+	async def get_name(self) -> str:
+		if self.name is None:
+			name = await get_channel_layer().new_channel("game_session_owner")
+
+			if self.name is None:
+				self.name = name
+
+		if self.listener is None or self.listener.done():
+			self.listener = asyncio.create_task(self.listen())
+
+		return self.name
+
+	def finish_message(self, message_task: asyncio.Task):
+		self.message_tasks.discard(message_task)
+
+		if not message_task.cancelled() and message_task.exception() is not None:
+			logger.error("Forwarded session message failed", exc_info=message_task.exception())
+
+	# Handlers are started in arrival order and a move is queued before its handler first awaits, so moves keep their order
+	async def listen(self):
+		channel_layer = get_channel_layer()
+
+		while True:
+			message = await channel_layer.receive(self.name)
+			message_task = asyncio.create_task(handle_forwarded_message(message))
+
+			self.message_tasks.add(message_task)
+			message_task.add_done_callback(self.finish_message)
+
+# Shared by every session in the process
+session_owner_channel = SessionOwnerChannel()
@@ -0,0 +1,11 @@
+from gameplay.game_session import start_deadline_sweep
+
+# Daphne has no startup hook, so the sweep is started by the first connection or request the process serves
+class DeadlineSweepMiddleware:
+	def __init__(self, inner):
+		self.inner = inner
+
+	async def __call__(self, scope, receive, send):
+		start_deadline_sweep()
+
+		return await self.inner(scope, receive, send)
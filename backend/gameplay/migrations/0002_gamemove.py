@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameMove',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ply', models.PositiveIntegerField()),
+                ('encoded_move', models.PositiveIntegerField()),
+                ('algebraic_notation', models.CharField(max_length=10)),
+                ('move_type', models.CharField(max_length=20)),
+                ('resulting_fen', models.JSONField()),
+                ('zobrist_hash', models.CharField(max_length=16)),
+                ('white_player_clock', models.DecimalField(decimal_places=1, max_digits=7)),
+                ('black_player_clock', models.DecimalField(decimal_places=1, max_digits=7)),
+                ('chess_game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moves', to='gameplay.chessgame')),
+            ],
+            options={
+                'ordering': ['ply'],
+                'constraints': [models.UniqueConstraint(fields=('chess_game', 'ply'), name='unique_game_move_ply')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0002_gamemove'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamemove',
+            name='resulting_fen',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0003_alter_gamemove_resulting_fen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chessgame',
+            name='flag_deadline',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0004_chessgame_flag_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chessgame',
+            name='session_heartbeat',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
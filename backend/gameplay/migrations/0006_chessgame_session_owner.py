@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0005_chessgame_session_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chessgame',
+            name='session_owner',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
@@ -1,11 +1,14 @@
 from uuid import uuid4
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 from channels.db import database_sync_to_async
 
+from move_validation.utils.moves import get_from_square, get_to_square
+
 from .utils.fen_parser import parse_board_placement
+from .utils.position_history import get_position_list, get_position_at_ply, get_recent_position_hashes
 
 def get_default_board_placement():
 	initial_raw_board_placement = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
@@ -39,6 +42,12 @@ def get_default_position_list():
 		"last_dragged_square": None,
 		"last_dropped_square": None
 	}]
+
+def append_to_move_list(move_list: list, algebraic_notation: str):
+	if len(move_list) <= 0 or len(move_list[-1]) == 2:
+		move_list.append([algebraic_notation])
+	else:
+		move_list[-1].append(algebraic_notation)
 	
 class TimerTask(models.Model):
 	timer_task_id = models.UUIDField(default=uuid4, unique=True, primary_key=True)
@@ -72,16 +81,54 @@ class ChessGame(models.Model):
 	en_passant_target_square = models.IntegerField(null=True, blank=True)
 
 	is_timer_running = models.BooleanField(default=False, null=False, blank=False)
+	# Wall clock time at which the side to move flags, kept so timeouts can be adjudicated after a restart
+	flag_deadline = models.DateTimeField(null=True, blank=True, db_index=True)
+	# Refreshed while a process holds the game's session; only games without a recent one are left to the deadline sweep
+	session_heartbeat = models.DateTimeField(null=True, blank=True)
+	# Channel of the process holding the session, which every other process forwards the game's moves to
+	session_owner = models.CharField(max_length=100, null=True, blank=True)
 	timer_initiator = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="timer_initiator", null=True, blank=True)
 
 	position_list = models.JSONField(default=get_default_position_list, null=False, blank=False)
 	move_list = models.JSONField(default=list, null=False, blank=False)
 
-	def sync_get_position_list(self):
-		return self.position_list
+	# Columns a move changes, so saving one never rewrites the legacy position_list/move_list JSON
+	move_state_fields = [
+		"current_move", "current_player_turn", "halfmove_clock",
+		"white_player_clock", "black_player_clock",
+		"parsed_board_placement", "castling_rights", "en_passant_target_square"
+	]
+
+	# position_list and move_list only hold what was played before moves were stored as GameMove rows
+	def sync_get_position_list(self, from_ply: int = 0, to_ply: int = None):
+		return get_position_list(self, from_ply, to_ply)
+
+	def sync_get_position_at_ply(self, ply: int):
+		return get_position_at_ply(self, ply)
 	
 	def sync_get_move_list(self):
-		return self.move_list
+		move_list = [list(move_pair) for move_pair in self.move_list]
+
+		for algebraic_notation in self.moves.values_list("algebraic_notation", flat=True):
+			append_to_move_list(move_list, algebraic_notation)
+
+		return move_list
+
+	@database_sync_to_async
+	def async_get_position_list(self):
+		return self.sync_get_position_list()
+
+	@database_sync_to_async
+	def async_get_move_list(self):
+		return self.sync_get_move_list()
+
+	# Oldest first, ending with the current position
+	def sync_get_recent_position_hashes(self, count: int):
+		return get_recent_position_hashes(self, count)
+
+	@database_sync_to_async
+	def async_get_recent_position_hashes(self, count: int):
+		return self.sync_get_recent_position_hashes(count)
 
 	@database_sync_to_async
 	def get_full_parsed_fen(self):
@@ -97,7 +144,82 @@ class ChessGame(models.Model):
 	def async_end_game(self, game_result):
 		self.game_status = "Ended"
 		self.game_result = game_result
-		self.save()
+		self.flag_deadline = None
+		self.save(update_fields=["game_status", "game_result", "flag_deadline"])
+
+	@classmethod
+	def get_unowned_games(cls, heartbeat_cutoff):
+		return cls.objects.filter(models.Q(session_heartbeat__isnull=True) | models.Q(session_heartbeat__lt=heartbeat_cutoff))
+
+	# A game whose session was taken over elsewhere keeps the new owner's heartbeat
+	@classmethod
+	def sync_refresh_session_heartbeats(cls, game_ids, now, session_owner=None):
+		games = cls.objects.filter(id__in=game_ids)
+
+		if session_owner is not None:
+			games = games.filter(models.Q(session_owner=session_owner) | models.Q(session_owner__isnull=True))
+
+		games.update(session_heartbeat=now)
+
+	# Takes the session over unless another process holds a live one, and returns whichever owner ends up holding it
+	@classmethod
+	def sync_claim_session(cls, game_id, session_owner, now, heartbeat_cutoff):
+		claimable_games = cls.get_unowned_games(heartbeat_cutoff) | cls.objects.filter(
+			models.Q(session_owner=session_owner) | models.Q(session_owner__isnull=True)
+		)
+
+		if claimable_games.filter(id=game_id).update(session_heartbeat=now, session_owner=session_owner):
+			return session_owner
+
+		return cls.objects.values_list("session_owner", flat=True).get(id=game_id)
+
+	@classmethod
+	def sync_release_session(cls, game_id, session_owner):
+		cls.objects.filter(id=game_id, session_owner=session_owner).update(session_owner=None, session_heartbeat=None)
+
+	# Ends every ongoing game no process holds whose deadline has passed on time, optionally only those in game_ids,
+	# and returns (id, timeout color, white clock, black clock) for each
+	@classmethod
+	def sync_adjudicate_expired_games(cls, now, heartbeat_cutoff, excluded_game_ids=(), game_ids=None):
+		expired_games = (
+			cls.get_unowned_games(heartbeat_cutoff)
+			.filter(game_status="Ongoing", flag_deadline__lte=now)
+			.exclude(id__in=excluded_game_ids)
+		)
+
+		if game_ids is not None:
+			expired_games = expired_games.filter(id__in=game_ids)
+
+		with transaction.atomic():
+			expired_games = list(
+				expired_games.select_for_update(skip_locked=True)
+				.values_list("id", "current_player_turn", "white_player_clock", "black_player_clock")
+			)
+
+			for timeout_color in ["white", "black"]:
+				timed_out_game_ids = [game_id for game_id, side_to_move, _, _ in expired_games if side_to_move.lower() == timeout_color]
+
+				if timed_out_game_ids:
+					cls.objects.filter(id__in=timed_out_game_ids).update(**{
+						f"{timeout_color}_player_clock": 0,
+						"game_status": "Ended",
+						"game_result": "Timeout",
+						"flag_deadline": None
+					})
+
+		return [
+			(game_id, side_to_move.lower(), white_player_clock, black_player_clock)
+			for game_id, side_to_move, white_player_clock, black_player_clock in expired_games
+		]
+
+	@classmethod
+	def sync_get_live_game_deadlines(cls, heartbeat_cutoff, excluded_game_ids=()):
+		return list(
+			cls.get_unowned_games(heartbeat_cutoff)
+			.filter(game_status="Ongoing", flag_deadline__isnull=False)
+			.exclude(id__in=excluded_game_ids)
+			.values_list("id", "flag_deadline")
+		)
 
 	@database_sync_to_async
 	def async_get_white_player_username(self):
@@ -160,6 +282,37 @@ class ChessGame(models.Model):
 	def sync_get_game_attribute(self, attribute_name):
 		return getattr(self, attribute_name)
 	
+class GameMove(models.Model):
+	chess_game = models.ForeignKey(ChessGame, on_delete=models.CASCADE, related_name="moves")
+	ply = models.PositiveIntegerField()
+
+	# 16-bit packed move, see move_validation.utils.moves
+	encoded_move = models.PositiveIntegerField()
+	algebraic_notation = models.CharField(max_length=10)
+	move_type = models.CharField(max_length=20)
+
+	# Only filled in on keyframe plies, see gameplay.utils.position_history
+	resulting_fen = models.JSONField(null=True, blank=True)
+	zobrist_hash = models.CharField(max_length=16)
+
+	white_player_clock = models.DecimalField(max_digits=7, decimal_places=1)
+	black_player_clock = models.DecimalField(max_digits=7, decimal_places=1)
+
+	class Meta:
+		ordering = ["ply"]
+		constraints = [
+			models.UniqueConstraint(fields=["chess_game", "ply"], name="unique_game_move_ply")
+		]
+
+	def get_position_list_entry(self, parsed_fen: dict):
+		return {
+			"position": parsed_fen,
+			"last_dragged_square": str(get_from_square(self.encoded_move)),
+			"last_dropped_square": str(get_to_square(self.encoded_move)),
+			"move_type": self.move_type,
+			"zobrist_hash": self.zobrist_hash
+		}
+
 class UserGameplaySettings(models.Model):
 	user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
 	auto_queen = models.BooleanField(default=False, blank=False, null=False)
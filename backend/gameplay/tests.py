@@ -1,3 +1,415 @@
-from django.test import TestCase
+import asyncio
+import random
 
-# Create your tests here.
+from time import monotonic
+from datetime import timedelta
+from unittest.mock import patch
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from move_validation.utils.perft import PERFT_POSITIONS
+from move_validation.utils.position import Position
+from move_validation.utils.get_move_type import get_move_type, get_encoded_move_type
+from move_validation.utils.result_detection import evaluate_game_state
+from move_validation.utils.move_generation import generate_legal_moves, get_move_info
+
+from .models import ChessGame, GameMove
+from .utils.algebraic_notation_parser import get_algebraic_notation, get_move_algebraic_notation
+from .utils.position_history import KEYFRAME_INTERVAL, get_position_list
+from .game_session import (
+	GameSession, RemoteGameSession, game_sessions, get_game_session, release_game_session,
+	recover_flag_deadline, session_owner_channel, sync_load_chess_game
+)
+from .timer_scheduler import TimerScheduler, timer_scheduler
+
+e2e4_move_info = {
+	"piece_color": "white",
+	"piece_type": "pawn",
+	"starting_square": "12",
+	"initial_square": 12,
+	"destination_square": "28",
+	"additional_info": {}
+}
+
+# TransactionTestCase so the session's own atomic block is the outermost one and adds no savepoint queries
+class MoveQueryCountTestCase(TransactionTestCase):
+	def setUp(self):
+		user_model = get_user_model()
+
+		white_player = user_model.objects.create_user("white_player", "white_player@example.com", "password")
+		black_player = user_model.objects.create_user("black_player", "black_player@example.com", "password")
+
+		self.chess_game = ChessGame.objects.create(
+			white_player=white_player,
+			black_player=black_player,
+			white_player_clock=180,
+			black_player_clock=180
+		)
+
+	def load_game_session(self) -> GameSession:
+		chess_game, position_hashes = sync_load_chess_game(self.chess_game.id)
+
+		return GameSession(chess_game, position_hashes)
+
+	def test_session_needs_no_queries_after_loading(self):
+		chess_game, position_hashes = sync_load_chess_game(self.chess_game.id)
+
+		with self.assertNumQueries(0):
+			game_session = GameSession(chess_game, position_hashes)
+
+		self.assertEqual(game_session.get_player_username("white"), "white_player")
+		self.assertEqual(game_session.get_player_username("black"), "black_player")
+
+	# Only the statements the save itself sends, since some backends also log BEGIN and COMMIT
+	def get_statements(self, captured_queries: CaptureQueriesContext) -> list:
+		return [
+			query["sql"].split()[0].upper() for query in captured_queries
+			if query["sql"].split()[0].upper() not in ("BEGIN", "COMMIT", "SAVEPOINT", "RELEASE")
+		]
+
+	def test_save_costs_one_locked_read_and_two_writes(self):
+		game_session = self.load_game_session()
+
+		with self.assertNumQueries(0):
+			move_events = game_session.apply_move(e2e4_move_info, "white_player")
+
+		self.assertEqual(move_events[0]["type"], "move_applied")
+
+		with CaptureQueriesContext(connection) as captured_queries:
+			game_session.sync_save_game_state(game_session.get_persisted_state(), game_session.pending_game_moves)
+
+		# The locked read, the ChessGame update and the GameMove insert
+		self.assertEqual(self.get_statements(captured_queries), ["SELECT", "UPDATE", "INSERT"])
+
+		self.chess_game.refresh_from_db()
+
+		self.assertEqual(self.chess_game.current_player_turn, "black")
+		self.assertEqual(GameMove.objects.filter(chess_game=self.chess_game).count(), 1)
+
+	def test_game_ended_elsewhere_is_not_reopened(self):
+		game_session = self.load_game_session()
+		game_session.apply_move(e2e4_move_info, "white_player")
+
+		ChessGame.objects.filter(id=self.chess_game.id).update(game_status="Ended", game_result="Timeout")
+
+		saved_game_state = game_session.sync_save_game_state(game_session.get_persisted_state(), game_session.pending_game_moves)
+		self.chess_game.refresh_from_db()
+
+		self.assertEqual(saved_game_state, ("Ended", "Timeout"))
+		self.assertEqual(self.chess_game.game_status, "Ended")
+		self.assertEqual(self.chess_game.game_result, "Timeout")
+
+	async def test_failed_save_keeps_moves_for_retry(self):
+		game_session = await database_sync_to_async(self.load_game_session)()
+		game_session.apply_move(e2e4_move_info, "white_player")
+
+		with patch.object(GameSession, "async_save_game_state", side_effect=DatabaseError), self.assertLogs("gameplay.game_session", "ERROR"):
+			await game_session.flush()
+
+		self.assertEqual(len(game_session.pending_game_moves), 1)
+		self.assertFalse(game_session.flush_task.done())
+
+		game_session.flush_task.cancel()
+
+	async def test_game_end_events_survive_failed_save(self):
+		game_session = await database_sync_to_async(self.load_game_session)()
+		game_session.turn_started_at = monotonic() - 200
+
+		with patch.object(GameSession, "async_save_game_state", side_effect=DatabaseError), self.assertLogs("gameplay.game_session", "ERROR"):
+			move_events = await game_session.submit_move(e2e4_move_info, "white_player")
+
+		self.assertEqual(move_events[0]["type"], "player_timeout")
+		self.assertFalse(game_session.is_ongoing)
+
+		game_session.flush_task.cancel()
+		game_session.move_processor.cancel()
+
+	async def test_game_result_keeps_abandonment_timer(self):
+		game_session = await database_sync_to_async(self.load_game_session)()
+		game_session.add_connection()
+		game_session.remove_connection()
+
+		game_session.set_game_result("Resigned")
+
+		self.assertTrue(timer_scheduler.is_scheduled(self.chess_game.id, "abandonment"))
+
+		timer_scheduler.cancel(self.chess_game.id, "abandonment")
+
+	async def test_game_ended_with_nobody_connected_releases_its_session(self):
+		game_session = await get_game_session(self.chess_game.id)
+		game_session.add_connection()
+		game_session.remove_connection()
+
+		await game_session.end_game("Resigned")
+
+		self.assertNotIn(self.chess_game.id, game_sessions)
+		self.assertFalse(timer_scheduler.is_scheduled(self.chess_game.id, "abandonment"))
+
+class SessionOwnershipTestCase(TransactionTestCase):
+	def setUp(self):
+		user_model = get_user_model()
+
+		white_player = user_model.objects.create_user("white_player", "white_player@example.com", "password")
+		black_player = user_model.objects.create_user("black_player", "black_player@example.com", "password")
+
+		self.chess_game = ChessGame.objects.create(
+			white_player=white_player,
+			black_player=black_player,
+			white_player_clock=180,
+			black_player_clock=180
+		)
+
+	async def hold_elsewhere(self, heartbeat_age=timedelta()) -> str:
+		other_session_owner = await get_channel_layer().new_channel("game_session_owner")
+
+		await ChessGame.objects.filter(id=self.chess_game.id).aupdate(
+			session_owner=other_session_owner,
+			session_heartbeat=timezone.now() - heartbeat_age
+		)
+
+		return other_session_owner
+
+	async def test_move_for_a_game_held_elsewhere_is_forwarded(self):
+		other_session_owner = await self.hold_elsewhere()
+
+		game_session = await get_game_session(self.chess_game.id)
+
+		self.assertIsInstance(game_session, RemoteGameSession)
+		self.assertNotIn(self.chess_game.id, game_sessions)
+
+		await game_session.handle_move(e2e4_move_info, "white_player")
+
+		message = await get_channel_layer().receive(other_session_owner)
+
+		self.assertEqual(message["type"], "session.move")
+		self.assertEqual(message["move_info"], e2e4_move_info)
+		self.assertFalse(await GameMove.objects.filter(chess_game=self.chess_game).aexists())
+
+	async def test_game_with_stale_owner_is_taken_over(self):
+		await self.hold_elsewhere(timedelta(minutes=5))
+
+		game_session = await get_game_session(self.chess_game.id)
+
+		self.assertIsInstance(game_session, GameSession)
+
+		chess_game = await ChessGame.objects.aget(id=self.chess_game.id)
+		self.assertEqual(chess_game.session_owner, session_owner_channel.name)
+
+		await release_game_session(self.chess_game.id)
+
+		chess_game = await ChessGame.objects.aget(id=self.chess_game.id)
+		self.assertIsNone(chess_game.session_owner)
+
+	async def test_forwarded_move_is_applied_once_by_the_owner(self):
+		channel_layer = get_channel_layer()
+		game_session = await get_game_session(self.chess_game.id)
+
+		player_channel = await channel_layer.new_channel()
+		await channel_layer.group_add(game_session.room_group_name, player_channel)
+
+		await RemoteGameSession(self.chess_game.id, session_owner_channel.name).handle_move(e2e4_move_info, "white_player")
+
+		event = await asyncio.wait_for(channel_layer.receive(player_channel), 5)
+
+		self.assertEqual(event["type"], "move_processed")
+		self.assertEqual(event["move_events"][0]["algebraic_notation"], "e4")
+		self.assertEqual(game_session.side_to_move, "black")
+
+		await release_game_session(self.chess_game.id)
+
+		self.assertEqual(await GameMove.objects.filter(chess_game=self.chess_game).acount(), 1)
+
+	async def test_session_taken_over_elsewhere_stops_writing(self):
+		game_session = await get_game_session(self.chess_game.id)
+		await self.hold_elsewhere()
+
+		await game_session.submit_move(e2e4_move_info, "white_player")
+
+		with self.assertLogs("gameplay.game_session", "WARNING"):
+			await game_session.flush()
+
+		self.assertNotIn(self.chess_game.id, game_sessions)
+		self.assertEqual(await game_session.submit_move(e2e4_move_info, "white_player"), [])
+		self.assertFalse(await GameMove.objects.filter(chess_game=self.chess_game).aexists())
+
+		game_session.flush_task.cancel()
+		game_session.move_processor.cancel()
+
+# A game long enough to cross several keyframes, played through a session so the rows are stored as in a real game
+class PositionHistoryTestCase(TransactionTestCase):
+	ply_count = 3 * KEYFRAME_INTERVAL + 5
+
+	def setUp(self):
+		user_model = get_user_model()
+
+		white_player = user_model.objects.create_user("white_player", "white_player@example.com", "password")
+		black_player = user_model.objects.create_user("black_player", "black_player@example.com", "password")
+
+		self.chess_game = ChessGame.objects.create(
+			white_player=white_player,
+			black_player=black_player,
+			white_player_clock=180,
+			black_player_clock=180
+		)
+
+		game_session = GameSession(*sync_load_chess_game(self.chess_game.id))
+		move_random = random.Random(1)
+
+		self.played_positions = [game_session.chess_game.sync_get_full_parsed_fen()]
+
+		while len(self.played_positions) <= self.ply_count:
+			move = move_random.choice(list(generate_legal_moves(game_session.position)))
+			move_info = get_move_info(game_session.position, move)
+
+			self.assertTrue(game_session.apply_move(move_info, game_session.get_player_username(move_info["piece_color"])))
+			self.played_positions.append(game_session.chess_game.sync_get_full_parsed_fen())
+
+		game_session.sync_save_game_state(game_session.get_persisted_state(), game_session.pending_game_moves)
+		timer_scheduler.cancel(self.chess_game.id, "flag")
+
+		self.chess_game.refresh_from_db()
+
+	def test_replayed_positions_match_the_played_ones(self):
+		position_list = get_position_list(self.chess_game)
+
+		self.assertEqual([entry["position"] for entry in position_list], self.played_positions)
+
+		for ply, played_position in enumerate(self.played_positions):
+			with self.subTest(ply=ply):
+				self.assertEqual(self.chess_game.sync_get_position_at_ply(ply).to_parsed_fen(), played_position)
+
+	def test_ranges_are_slices_of_the_full_list(self):
+		position_list = get_position_list(self.chess_game)
+		ply_ranges = [
+			(0, 0), (0, None), (5, 20), (KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL + 1), (KEYFRAME_INTERVAL, KEYFRAME_INTERVAL),
+			(KEYFRAME_INTERVAL + 1, 2 * KEYFRAME_INTERVAL), (2 * KEYFRAME_INTERVAL + 3, None), (self.ply_count, self.ply_count)
+		]
+
+		for from_ply, to_ply in ply_ranges:
+			with self.subTest(from_ply=from_ply, to_ply=to_ply):
+				self.assertEqual(
+					get_position_list(self.chess_game, from_ply, to_ply),
+					position_list[from_ply:None if to_ply is None else to_ply + 1]
+				)
+
+	def test_invalid_ranges_are_rejected(self):
+		api_client = APIClient()
+		api_client.force_authenticate(self.chess_game.white_player)
+
+		for query_string in ["from_ply=-1", "to_ply=-1", "from_ply=5&to_ply=4", "from_ply=a"]:
+			with self.subTest(query_string=query_string):
+				response = api_client.post(f"{reverse('get_position_list')}?{query_string}", {"game_id": self.chess_game.id})
+				self.assertEqual(response.status_code, 400)
+
+		response = api_client.post(f"{reverse('get_position_list')}?from_ply=5&to_ply=5", {"game_id": self.chess_game.id})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()[0]["position"], self.played_positions[5])
+
+		self.assertRaises(ValueError, get_position_list, self.chess_game, 3, 2)
+
+class DeadlineRecoveryTestCase(TransactionTestCase):
+	def setUp(self):
+		user_model = get_user_model()
+
+		white_player = user_model.objects.create_user("white_player", "white_player@example.com", "password")
+		black_player = user_model.objects.create_user("black_player", "black_player@example.com", "password")
+
+		self.chess_game = ChessGame.objects.create(
+			white_player=white_player,
+			black_player=black_player,
+			white_player_clock=180,
+			black_player_clock=180,
+			is_timer_running=True,
+			flag_deadline=timezone.now() - timedelta(seconds=5)
+		)
+
+	def adjudicate(self) -> list:
+		now = timezone.now()
+
+		return ChessGame.sync_adjudicate_expired_games(now, now - timedelta(seconds=90))
+
+	def test_game_held_by_a_live_session_is_left_alone(self):
+		ChessGame.sync_refresh_session_heartbeats([self.chess_game.id], timezone.now())
+
+		self.assertEqual(self.adjudicate(), [])
+		self.assertEqual(ChessGame.sync_get_live_game_deadlines(timezone.now() - timedelta(seconds=90)), [])
+
+		self.chess_game.refresh_from_db()
+		self.assertEqual(self.chess_game.game_status, "Ongoing")
+
+	def test_game_with_stale_heartbeat_is_adjudicated(self):
+		ChessGame.sync_refresh_session_heartbeats([self.chess_game.id], timezone.now() - timedelta(minutes=5))
+
+		self.assertEqual([game_id for game_id, *_ in self.adjudicate()], [self.chess_game.id])
+
+		self.chess_game.refresh_from_db()
+		self.assertEqual(self.chess_game.game_result, "Timeout")
+		self.assertEqual(self.chess_game.white_player_clock, 0)
+
+	async def test_recovered_deadline_does_not_load_a_session(self):
+		await recover_flag_deadline(self.chess_game.id)
+
+		self.assertNotIn(self.chess_game.id, game_sessions)
+
+		chess_game = await ChessGame.objects.aget(id=self.chess_game.id)
+		self.assertEqual(chess_game.game_status, "Ended")
+
+class TimerSchedulerTestCase(SimpleTestCase):
+	async def test_failed_callback_is_logged_and_released(self):
+		timer_scheduler = TimerScheduler()
+		callback_finished = asyncio.Event()
+
+		async def failing_callback():
+			callback_finished.set()
+			raise ValueError("flag handling failed")
+
+		with self.assertLogs("gameplay.timer_scheduler", "ERROR") as logs:
+			timer_scheduler.schedule(1, "flag", monotonic(), failing_callback)
+
+			await callback_finished.wait()
+			await asyncio.sleep(0)
+
+		self.assertIn("flag handling failed", logs.output[0])
+		self.assertEqual(timer_scheduler.callback_tasks, set())
+
+		timer_scheduler.runner.cancel()
+
+class EncodedMoveNotationTestCase(SimpleTestCase):
+	# The session derives notation from its live position; it must agree with the board_placement based helpers
+	def test_matches_board_placement_notation(self):
+		move_random = random.Random(0)
+
+		for name, fen, _ in PERFT_POSITIONS:
+			position = Position.from_fen(fen)
+
+			for _ in range(40):
+				moves = list(generate_legal_moves(position))
+
+				if not moves:
+					break
+
+				move = move_random.choice(moves)
+				move_info = get_move_info(position, move)
+				board_placement = position.to_board_placement()
+
+				expected_move_type = get_move_type(board_placement, position.en_passant_square, move_info)
+				expected_notation = get_algebraic_notation(board_placement, position.en_passant_square, move_info)
+
+				algebraic_notation = get_move_algebraic_notation(position, move)
+				position.make_move(move)
+				is_check = evaluate_game_state(position).is_check
+
+				with self.subTest(position=name, notation=expected_notation):
+					self.assertEqual(get_encoded_move_type(move, is_check, move_info), expected_move_type)
+					self.assertEqual(algebraic_notation, expected_notation.rstrip("+"))
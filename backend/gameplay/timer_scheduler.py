@@ -0,0 +1,101 @@
+import heapq
+import asyncio
+import logging
+
+from itertools import count
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+class TimerScheduler:
+	def __init__(self):
+		# Entries are (deadline, sequence, timer_key); an entry is stale once its sequence no longer
+		# matches the one in scheduled_timers, so rescheduling never has to search the heap
+		self.deadline_heap = []
+		self.scheduled_timers = {}
+		self.sequence = count()
+
+		self.wake_event = None
+		self.runner = None
+
+		# The event loop only holds weak references to tasks, so running callbacks are kept here until they finish
+		self.callback_tasks = set()
+
+	def __len__(self):
+		return len(self.scheduled_timers)
+
+	def schedule(self, game_id, timer_type: str, deadline: float, callback):
+		timer_key = (game_id, timer_type)
+		sequence = next(self.sequence)
+
+		self.scheduled_timers[timer_key] = (sequence, callback)
+		heapq.heappush(self.deadline_heap, (deadline, sequence, timer_key))
+
+		self.compact()
+		self.ensure_running()
+
+		if self.deadline_heap[0][1] == sequence:
+			self.wake_event.set()
+
+	def cancel(self, game_id, timer_type: str):
+		self.scheduled_timers.pop((game_id, timer_type), None)
+
+	def is_scheduled(self, game_id, timer_type: str) -> bool:
+		return (game_id, timer_type) in self.scheduled_timers
+
+	# Stale entries are dropped once they outnumber the live ones
+	def compact(self):
+		if len(self.deadline_heap) <= 2 * len(self.scheduled_timers) + 64:
+			return
+
+		self.deadline_heap = [
+			entry for entry in self.deadline_heap
+			if self.scheduled_timers.get(entry[2], (None,))[0] == entry[1]
+		]
+		heapq.heapify(self.deadline_heap)
+
+	def ensure_running(self):
+		if self.runner is None or self.runner.done():
+			self.wake_event = asyncio.Event()
+			self.runner = asyncio.create_task(self.run())
+
+	def pop_due_callbacks(self, now: float) -> list:
+		due_callbacks = []
+
+		while self.deadline_heap and self.deadline_heap[0][0] <= now:
+			_, sequence, timer_key = heapq.heappop(self.deadline_heap)
+			scheduled_timer = self.scheduled_timers.get(timer_key)
+
+			if scheduled_timer is None or scheduled_timer[0] != sequence:
+				continue
+
+			del self.scheduled_timers[timer_key]
+			due_callbacks.append(scheduled_timer[1])
+
+		return due_callbacks
+
+	def finish_callback(self, callback_task: asyncio.Task):
+		self.callback_tasks.discard(callback_task)
+
+		if not callback_task.cancelled() and callback_task.exception() is not None:
+			logger.error("Timer callback failed", exc_info=callback_task.exception())
+
+	async def run(self):
+		while True:
+			self.wake_event.clear()
+
+			for callback in self.pop_due_callbacks(monotonic()):
+				callback_task = asyncio.create_task(callback())
+
+				self.callback_tasks.add(callback_task)
+				callback_task.add_done_callback(self.finish_callback)
+
+			timeout = self.deadline_heap[0][0] - monotonic() if self.deadline_heap else None
+
+			try:
+				await asyncio.wait_for(self.wake_event.wait(), timeout)
+			except asyncio.TimeoutError:
+				pass
+
+# Shared by every game in the process
+timer_scheduler = TimerScheduler()
@@ -1,6 +1,8 @@
 from typing import TypedDict
 from move_validation.utils.general import *
-from move_validation.utils.get_legal_moves import get_legal_moves_of_piece
+from move_validation.utils.position import Position, PAWN, parse_color, parse_piece_type
+from move_validation.utils.moves import KINGSIDE_CASTLING, get_move_flags, get_promotion_piece_type, is_capture, is_castling
+from move_validation.utils.move_generation import generate_legal_moves, get_from_square, get_to_square
 from move_validation.utils.get_move_type import get_is_check, get_is_capture, get_is_castling, get_is_promotion
 from .enums import PieceType
 from .fen_parser import parse_board_placement
@@ -14,6 +16,9 @@ piece_notation_mapping = {
     PieceType.QUEEN.value: "q"
 }
 
+# Indexed by the Position piece type
+encoded_piece_notation = ["", "N", "B", "R", "Q", "K"]
+
 
 class MoveInfo(TypedDict):
     starting_square: str | int
@@ -29,28 +34,18 @@ def disambiguate_move(board_placement: dict, move_info: MoveInfo):
 
     other_possible_pieces = []
 
-    for square in board_placement.keys():
-        if square == starting_square:
-            continue
-
-        square_info = board_placement[square]
+    position = Position.from_board_placement(board_placement, side_to_move=piece_color)
+    same_piece_squares = position.pieces[parse_color(piece_color)][parse_piece_type(piece_type)] & ~(1 << int(starting_square))
 
-        if square_info["piece_color"].lower() != piece_color.lower():
+    for move in generate_legal_moves(position, same_piece_squares):
+        if get_to_square(move) != int(destination_square):
             continue
 
-        if square_info["piece_type"].lower() != piece_type.lower():
-            continue
-
-        piece_info = {
+        other_possible_pieces.append({
             "piece_color": piece_color,
             "piece_type": piece_type,
-            "piece_square": square
-        }
-
-        piece_legal_moves = get_legal_moves_of_piece(board_placement, piece_info)
-
-        if destination_square in piece_legal_moves:
-            other_possible_pieces.append(piece_info)
+            "piece_square": str(get_from_square(move))
+        })
 
     capture_notation = get_capture_notation(board_placement, None, move_info)
     check_notation = get_check_notation(board_placement, move_info)
@@ -101,8 +96,8 @@ def get_capture_notation(board_placement, en_passant_target_square, move_info):
     else:
         return ""
     
-def get_check_notation(board_placement, move_info):
-    if get_is_check(board_placement, move_info):
+def get_check_notation(board_placement, move_info, en_passant_target_square=None):
+    if get_is_check(board_placement, move_info, en_passant_target_square):
         return "+"
     else:
         return ""
@@ -124,7 +119,7 @@ def handle_pawn_move(board_placement: dict, en_passant_square, move_info: MoveIn
     starting_file_index = get_file(starting_square)
 
     capture_notation = get_capture_notation(board_placement, en_passant_square, move_info)
-    check_notation = get_check_notation(board_placement, move_info)
+    check_notation = get_check_notation(board_placement, move_info, en_passant_square)
 
     promotion_notation = get_promotion_notation(move_info)
 
@@ -161,4 +156,44 @@ def get_algebraic_notation(board_placement: dict, en_passant_square, move_info:
         return handle_pawn_move(board_placement, en_passant_square, move_info)
 
     else:
-        return handle_piece_move(board_placement, move_info)
\ No newline at end of file
+        return handle_piece_move(board_placement, move_info)
+
+
+# SAN for an encoded move, read from the position before the move is made; the check suffix is left to the caller
+def get_move_algebraic_notation(position: Position, move: int) -> str:
+    from_square = get_from_square(move)
+    to_square = get_to_square(move)
+    color, piece_type = position.board[from_square]
+
+    notated_square = convert_to_algebraic_notation(to_square)
+    capture_notation = "x" if is_capture(move) else ""
+
+    if is_castling(move):
+        return "O-O" if get_move_flags(move) == KINGSIDE_CASTLING else "O-O-O"
+
+    if piece_type == PAWN:
+        promotion_piece_type = get_promotion_piece_type(move)
+        promotion_notation = f"={encoded_piece_notation[promotion_piece_type]}" if promotion_piece_type is not None else ""
+        starting_file = files_list[from_square & 7] if capture_notation else ""
+
+        return f"{starting_file}{capture_notation}{notated_square}{promotion_notation}"
+
+    other_squares = [
+        get_from_square(other_move)
+        for other_move in generate_legal_moves(position, position.pieces[color][piece_type] & ~(1 << from_square))
+        if get_to_square(other_move) == to_square
+    ]
+
+    disambiguation = ""
+
+    if other_squares:
+        all_squares = other_squares + [from_square]
+
+        if len({square & 7 for square in all_squares}) > 1:
+            disambiguation = files_list[from_square & 7]
+        elif len({square >> 3 for square in all_squares}) > 1:
+            disambiguation = str((from_square >> 3) + 1)
+        else:
+            disambiguation = f"{files_list[from_square & 7]}{(from_square >> 3) + 1}"
+
+    return f"{encoded_piece_notation[piece_type]}{disambiguation}{capture_notation}{notated_square}"
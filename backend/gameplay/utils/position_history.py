@@ -0,0 +1,95 @@
+from move_validation.utils.position import Position, WHITE, BLACK
+
+# Only every KEYFRAME_INTERVAL-th GameMove row stores its full resulting position, the rest store just the move
+KEYFRAME_INTERVAL = 16
+
+def is_keyframe_ply(ply: int) -> bool:
+	return ply % KEYFRAME_INTERVAL == 0
+
+def get_side_to_move_at_ply(ply: int):
+	# Games always start with white to move
+	return WHITE if ply % 2 == 0 else BLACK
+
+def replay_game_moves(chess_game, from_ply: int = 0, to_ply: int = None):
+	legacy_position_list = chess_game.position_list
+	last_legacy_ply = len(legacy_position_list) - 1
+
+	# Start from the nearest keyframe at or before from_ply, or from the last position stored as JSON
+	keyframe_ply = max(from_ply - from_ply % KEYFRAME_INTERVAL, last_legacy_ply)
+
+	game_moves = chess_game.moves.filter(ply__gte=keyframe_ply)
+	if to_ply is not None:
+		game_moves = game_moves.filter(ply__lte=to_ply)
+
+	position = None
+	if keyframe_ply == last_legacy_ply:
+		position = Position.from_parsed_fen(legacy_position_list[last_legacy_ply]["position"], get_side_to_move_at_ply(last_legacy_ply))
+
+	for game_move in game_moves:
+		if game_move.resulting_fen is not None:
+			position = Position.from_parsed_fen(game_move.resulting_fen, get_side_to_move_at_ply(game_move.ply))
+		else:
+			position.make_move(game_move.encoded_move)
+
+		if game_move.ply >= from_ply:
+			yield game_move, position
+
+def is_valid_ply_range(from_ply: int, to_ply: int = None) -> bool:
+	if to_ply is None:
+		return from_ply >= 0
+
+	return 0 <= from_ply <= to_ply
+
+def get_position_list(chess_game, from_ply: int = 0, to_ply: int = None) -> list:
+	if not is_valid_ply_range(from_ply, to_ply):
+		raise ValueError(f"Invalid ply range {from_ply} to {to_ply}")
+
+	legacy_position_list = chess_game.position_list
+	last_legacy_ply = len(legacy_position_list) - 1
+
+	position_list = legacy_position_list[from_ply:None if to_ply is None else to_ply + 1]
+
+	if to_ply is not None and to_ply <= last_legacy_ply:
+		return position_list
+
+	for game_move, position in replay_game_moves(chess_game, from_ply, to_ply):
+		position_list.append(game_move.get_position_list_entry(position.to_parsed_fen()))
+
+	return position_list
+
+def get_position_list_entry_hash(position_list_entry: dict, ply: int) -> int:
+	if position_list_entry.get("zobrist_hash"):
+		return int(position_list_entry["zobrist_hash"], 16)
+
+	# Entries saved before hashes were stored
+	return Position.from_parsed_fen(position_list_entry["position"], get_side_to_move_at_ply(ply)).zobrist_hash
+
+def get_recent_position_hashes(chess_game, count: int) -> list:
+	game_move_hashes = list(chess_game.moves.order_by("-ply").values_list("zobrist_hash", flat=True)[:count])
+	game_move_hashes.reverse()
+
+	position_hashes = [int(zobrist_hash, 16) for zobrist_hash in game_move_hashes]
+
+	missing_count = count - len(position_hashes)
+	if missing_count > 0:
+		legacy_position_list = chess_game.position_list
+		first_legacy_ply = max(len(legacy_position_list) - missing_count, 0)
+
+		legacy_hashes = [
+			get_position_list_entry_hash(legacy_position_list[ply], ply) for ply in range(first_legacy_ply, len(legacy_position_list))
+		]
+
+		position_hashes = legacy_hashes + position_hashes
+
+	return position_hashes
+
+def get_position_at_ply(chess_game, ply: int) -> Position | None:
+	legacy_position_list = chess_game.position_list
+
+	if ply < len(legacy_position_list):
+		return Position.from_parsed_fen(legacy_position_list[ply]["position"], get_side_to_move_at_ply(ply))
+
+	for game_move, position in replay_game_moves(chess_game, ply, ply):
+		return position
+
+	return None
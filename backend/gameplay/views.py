@@ -13,6 +13,7 @@ from .serializers import ChessGameSerializer
 from core.utils import to_dict
 
 from .utils import fen_parser
+from .utils.position_history import is_valid_ply_range
 
 # Create your views here.
 class ParseFENView(APIView):
@@ -76,8 +77,19 @@ class GetPlayerTimerView(APIView):
 class GetPositionListView(APIView):
 	def post(self, request):
 		game_id = request.data.get("game_id")
+
+		try:
+			from_ply = int(request.query_params.get("from_ply", 0))
+			to_ply = request.query_params.get("to_ply")
+			to_ply = int(to_ply) if to_ply is not None else None
+		except ValueError:
+			return Response({"result": "from_ply and to_ply must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+		if not is_valid_ply_range(from_ply, to_ply):
+			return Response({"result": "from_ply and to_ply must not be negative and from_ply must not be after to_ply"}, status=status.HTTP_400_BAD_REQUEST)
+
 		chess_game_model: ChessGame = ChessGame.objects.get(id=game_id)
-		position_list = chess_game_model.sync_get_position_list()
+		position_list = chess_game_model.sync_get_position_list(from_ply, to_ply)
 
 		return Response(position_list, status=status.HTTP_200_OK)
 	
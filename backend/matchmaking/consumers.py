@@ -1,171 +1,13 @@
 import json
-import time
-import random
-
-from asyncio import create_task, sleep
 
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
 
-from .models import WaitingPlayer
-from gameplay.models import ChessGame
+from .matchmaking_service import matchmaking_service
 
 from urllib.parse import parse_qs
 
 
 class MatchmakingConsumer(AsyncWebsocketConsumer):
-    async def decide_player_color(self):
-        if random.choice([True, False]):
-            return "white", "black"
-        else:
-            return "black", "white"
-
-    @database_sync_to_async
-    def remove_player_from_queue(self, player_object):
-        player_object.delete()
-
-    @database_sync_to_async
-    def get_player_in_queue(self, player):
-        try:
-            player_in_queue = WaitingPlayer.objects.get(user=player)
-        except WaitingPlayer.DoesNotExist:
-            player_in_queue = None
-
-        return player_in_queue
-
-    @database_sync_to_async
-    def create_waiting_player(self, user_model):
-        WaitingPlayer.objects.create(
-            user=user_model, base_time=self.base_time, increment_time=self.increment)
-
-    @database_sync_to_async
-    def set_matched_player(self, player_to_set, matched_player):
-        player_to_set.matched_user = matched_player
-        player_to_set.save()
-
-    @database_sync_to_async
-    def is_player_matched(self, player_to_check):
-        return getattr(player_to_check, "matched_user")
-
-    @database_sync_to_async
-    def get_first_matching_player(self):
-        same_time_control_users = WaitingPlayer.objects.filter(
-            base_time=self.base_time, increment_time=self.increment)
-
-        return same_time_control_users.exclude(user=self.scope["user"]).first()
-
-    @database_sync_to_async
-    def get_matched_user(self, user_to_check):
-        try:
-            return WaitingPlayer.objects.get(matched_user=user_to_check)
-        except WaitingPlayer.DoesNotExist:
-            return None
-
-    @database_sync_to_async
-    def get_user_model_from_waiting_player(self, waiting_player: WaitingPlayer):
-        return waiting_player.user
-
-    @database_sync_to_async
-    def get_waiting_player_model_from_user(self, user_model):
-        waiting_player_model = WaitingPlayer.objects.get(user=user_model)
-
-        return waiting_player_model
-
-    @database_sync_to_async
-    def create_chess_game(self, white_player, black_player):
-
-        chess_game = ChessGame.objects.create(
-            white_player=white_player,
-            black_player=black_player,
-            white_player_clock=self.base_time,
-            black_player_clock=self.base_time,
-            white_player_increment=self.increment,
-            black_player_increment=self.increment
-        )
-
-        chess_game.save()
-
-        return chess_game.id
-
-    async def match_player(self):
-        player_to_match = self.scope["user"]
-        match_found = False
-
-        while not match_found:
-            player_in_queue = await self.get_player_in_queue(player_to_match)
-            matched_user = await self.get_matched_user(player_to_match)
-
-            if matched_user:
-
-                matched_player_color, player_to_match_color = await self.decide_player_color()
-
-                matched_player_user_model = await self.get_user_model_from_waiting_player(matched_user)
-
-                white_player = matched_player_user_model if matched_player_color == "white" else player_to_match
-                black_player = matched_player_user_model if matched_player_color == "black" else player_to_match
-
-                game_id = await self.create_chess_game(white_player, black_player)
-
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "player_matched",
-                        "match_found": True,
-                        "white_player": white_player.username,
-                        "black_player": black_player.username,
-                        "game_id": game_id,
-                    }
-                )
-
-                await self.channel_layer.group_send(
-                    f"user_{matched_player_user_model.id}",
-                    {
-                        "type": "player_matched",
-                        "match_found": True,
-                        "white_player": white_player.username,
-                        "black_player": black_player.username,
-                        "game_id": game_id,
-                    }
-                )
-
-                await self.remove_player_from_queue(matched_user)
-                await self.channel_layer.group_discard(
-                    f"user_{matched_player_user_model.id}",
-                    self.channel_name
-                )
-
-                match_found = True
-
-                break
-
-            if not player_in_queue:
-                matched_player = await self.get_first_matching_player()
-
-                await self.create_waiting_player(player_to_match)
-
-                if matched_player:
-                    waiting_player_to_match = await self.get_player_in_queue(player_to_match)
-
-                    await self.set_matched_player(matched_player, player_to_match)
-                    await self.set_matched_player(waiting_player_to_match, await self.get_user_model_from_waiting_player(matched_player))
-
-                else:
-                    await self.send(json.dumps({
-                        "type": "finding_match",
-                        "match_found": False,
-                        "white_player": None,
-                        "black_player": None
-                    }))
-            else:
-                await self.send(json.dumps({
-                    "type": "finding_match",
-                    "match_found": False,
-                    "white_player": None,
-                    "black_player": None
-                }))
-
-            await sleep(0.5)
-
     async def connect(self):
         user = self.scope["user"]
 
@@ -178,7 +20,6 @@ class MatchmakingConsumer(AsyncWebsocketConsumer):
 
         self.base_time = int(base_time)
         self.increment = int(increment)
-        self.match_player_task = create_task(self.match_player())
 
         self.room_group_name = f"user_{user.id}"
         await self.channel_layer.group_add(
@@ -193,16 +34,18 @@ class MatchmakingConsumer(AsyncWebsocketConsumer):
             "message": "Connection established",
         }))
 
-    async def disconnect(self, code):
-        try:
-            wating_player_model = await self.get_waiting_player_model_from_user(self.scope["user"])
-        except WaitingPlayer.DoesNotExist:
-            pass
-        else:
-            await self.remove_player_from_queue(wating_player_model)
+        await self.send(json.dumps({
+            "type": "finding_match",
+            "match_found": False,
+            "white_player": None,
+            "black_player": None
+        }))
+
+        # Pairing runs on the matchmaking tick; both sides are told through their user group
+        await matchmaking_service.join(user, self.base_time, self.increment)
 
-        if self.match_player_task:
-            self.match_player_task.cancel()
+    async def disconnect(self, code):
+        await matchmaking_service.leave(self.scope["user"])
 
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -214,15 +57,7 @@ class MatchmakingConsumer(AsyncWebsocketConsumer):
         parsed_data = json.loads(text_data)
 
         if parsed_data["type"] == "cancel_matchmaking":
-            try:
-                waiting_player_model = await self.get_waiting_player_model_from_user(self.scope["user"])
-            except WaitingPlayer.DoesNotExist:
-                pass
-            else:
-                await self.remove_player_from_queue(waiting_player_model)
-
-            self.match_player_task.cancel()
-            self.match_player_task = None
+            await matchmaking_service.leave(self.scope["user"])
 
             await self.send(json.dumps({
                 "type": "matchmaking_cancelled_successfully",
@@ -0,0 +1,104 @@
+import random
+
+from time import perf_counter
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from matchmaking.models import WaitingPlayer
+from matchmaking.rating_index import RATING_WINDOW, RatingIndex
+from matchmaking.matchmaking_service import pair_waiting_players
+
+BENCHMARK_TIME_CONTROL = (180, 2)
+
+class Command(BaseCommand):
+	help = "Measures how long pairing one player takes against rating indexes of growing size, or with --database a whole tick"
+
+	def add_arguments(self, parser):
+		parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+		parser.add_argument("--pairings", type=int, default=10000, help="Pairings timed per queue size")
+		parser.add_argument("--database", action="store_true", help="Time pair_waiting_players against the database instead")
+		parser.add_argument("--ticks", type=int, default=5, help="Ticks timed per queue size with --database")
+		parser.add_argument("--seed", type=int, default=0)
+
+	def handle(self, *args, **options):
+		if options["pairings"] <= 0 or options["ticks"] <= 0 or min(options["sizes"]) < 2:
+			raise CommandError("Need at least one pairing or tick and two queued players")
+
+		rating_random = random.Random(options["seed"])
+
+		for queue_size in options["sizes"]:
+			if options["database"]:
+				self.run_database_benchmark(queue_size, options["ticks"], rating_random)
+			else:
+				self.run_benchmark(queue_size, options["pairings"], rating_random)
+
+	# Everything is written inside one transaction that is rolled back, so the benchmark leaves no users, rows or games.
+	# Players paired by a tick rejoin before the next one, outside the timing, so every tick sees the full queue
+	def run_database_benchmark(self, queue_size: int, ticks: int, rating_random: random.Random):
+		user_model = get_user_model()
+		base_time, increment_time = BENCHMARK_TIME_CONTROL
+
+		with transaction.atomic():
+			users = user_model.objects.bulk_create([
+				user_model(
+					username=f"matchmaking_benchmark_{index}",
+					email=f"matchmaking_benchmark_{index}@example.com",
+					rating=round(rating_random.gauss(1500, 300))
+				)
+				for index in range(queue_size)
+			])
+
+			tick_seconds = []
+			game_count = 0
+
+			for _ in range(ticks):
+				waiting_user_ids = set(WaitingPlayer.objects.values_list("user", flat=True))
+
+				WaitingPlayer.objects.bulk_create([
+					WaitingPlayer(user=user, base_time=base_time, increment_time=increment_time)
+					for user in users if user.id not in waiting_user_ids
+				])
+
+				start = perf_counter()
+				game_count += len(pair_waiting_players())
+				tick_seconds.append(perf_counter() - start)
+
+			transaction.set_rollback(True)
+
+		self.stdout.write(
+			f"{queue_size} queued: {sum(tick_seconds) / ticks * 1000:.1f}ms per tick, "
+			f"slowest {max(tick_seconds) * 1000:.1f}ms ({game_count / ticks:.0f} games per tick)"
+		)
+
+	def run_benchmark(self, queue_size: int, pairings: int, rating_random: random.Random):
+		def get_rating() -> int:
+			return round(rating_random.gauss(1500, 300))
+
+		start = perf_counter()
+		rating_index = RatingIndex((get_rating(), key, None) for key in range(queue_size))
+		build_seconds = perf_counter() - start
+
+		next_key = queue_size
+		matched = 0
+		start = perf_counter()
+
+		# Each seeker takes the nearest opponent and is replaced by a new arrival, so the queue size holds steady
+		for _ in range(pairings):
+			opponent = rating_index.find_nearest(get_rating(), RATING_WINDOW)
+
+			if opponent is not None:
+				opponent_rating, opponent_key, _ = opponent
+				rating_index.remove(opponent_rating, opponent_key)
+				rating_index.add(get_rating(), next_key, None)
+
+				next_key += 1
+				matched += 1
+
+		pairing_seconds = perf_counter() - start
+
+		self.stdout.write(
+			f"{queue_size} queued: built in {build_seconds * 1000:.1f}ms, "
+			f"{pairing_seconds / pairings * 1_000_000:.2f}us per pairing ({matched}/{pairings} matched)"
+		)
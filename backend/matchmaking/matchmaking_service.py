@@ -0,0 +1,255 @@
+import time
+import random
+import asyncio
+import logging
+
+from itertools import groupby
+from collections import OrderedDict
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from gameplay.models import ChessGame
+
+from .models import WaitingPlayer
+from .rating_index import RatingIndex, get_rating_window
+from .matchmaking_store import get_matchmaking_store
+
+logger = logging.getLogger(__name__)
+
+# How often waiting players are paired; everyone who joined since the last tick is paired in one batch
+MATCHMAKING_TICK = 0.5
+
+def decide_player_colors(first_player, second_player):
+	if random.choice([True, False]):
+		return first_player, second_player
+	else:
+		return second_player, first_player
+
+def build_chess_game(white_player, black_player, time_control: tuple[int, int]) -> ChessGame:
+	base_time, increment_time = time_control
+
+	return ChessGame(
+		white_player=white_player,
+		black_player=black_player,
+		white_player_clock=base_time,
+		black_player_clock=base_time,
+		white_player_increment=increment_time,
+		black_player_increment=increment_time
+	)
+
+@database_sync_to_async
+def async_start_chess_game(user, opponent_id: int, time_control: tuple[int, int]):
+	opponent = get_user_model().objects.get(id=opponent_id)
+	white_player, black_player = decide_player_colors(user, opponent)
+
+	chess_game = build_chess_game(white_player, black_player, time_control)
+	chess_game.save()
+
+	return chess_game.id, white_player, black_player
+
+def enqueue_waiting_player(user, time_control: tuple[int, int]):
+	base_time, increment_time = time_control
+
+	WaitingPlayer.objects.update_or_create(
+		user=user,
+		defaults={"base_time": base_time, "increment_time": increment_time, "matched_user": None}
+	)
+
+@database_sync_to_async
+def async_enqueue_waiting_player(user, time_control: tuple[int, int]):
+	enqueue_waiting_player(user, time_control)
+
+# Oldest first, each player takes the closest rated player left in the pool within their rating window. A player
+# nobody fits stays out of the index, since everyone after them has waited less and so has a narrower window
+def pair_pool(pool: list, now) -> list:
+	rating_index = RatingIndex((waiting_player.user.rating, waiting_player.id, waiting_player) for waiting_player in pool)
+	pairs = []
+
+	for waiting_player in pool:
+		rating = waiting_player.user.rating
+
+		try:
+			rating_index.remove(rating, waiting_player.id)
+		except KeyError:
+			continue
+
+		waiting_seconds = (now - waiting_player.timestamp).total_seconds()
+		opponent = rating_index.find_nearest(rating, get_rating_window(waiting_seconds))
+
+		if opponent is None:
+			continue
+
+		opponent_rating, opponent_id, opponent_waiting_player = opponent
+		rating_index.remove(opponent_rating, opponent_id)
+
+		pairs.append((waiting_player, opponent_waiting_player))
+
+	return pairs
+
+# Pairs everyone waiting in one pass, within each (base_time, increment_time) pool. Rows another worker is already
+# pairing are skipped, and the games are created and the rows deleted in the same transaction.
+# Returns (game_id, white_player, black_player) for each game started
+def pair_waiting_players() -> list:
+	with transaction.atomic():
+		waiting_players = list(
+			WaitingPlayer.objects.select_for_update(skip_locked=True, of=("self",))
+			.select_related("user")
+			.order_by("base_time", "increment_time", "timestamp", "id")
+		)
+
+		now = timezone.now()
+		pairings = []
+		paired_waiting_player_ids = []
+
+		for time_control, pool in groupby(waiting_players, key=lambda waiting_player: (waiting_player.base_time, waiting_player.increment_time)):
+			for first_waiting_player, second_waiting_player in pair_pool(list(pool), now):
+				white_player, black_player = decide_player_colors(first_waiting_player.user, second_waiting_player.user)
+
+				pairings.append((build_chess_game(white_player, black_player, time_control), white_player, black_player))
+
+				paired_waiting_player_ids += [first_waiting_player.id, second_waiting_player.id]
+
+		if not pairings:
+			return []
+
+		chess_games = ChessGame.objects.bulk_create([chess_game for chess_game, _, _ in pairings])
+		WaitingPlayer.objects.filter(id__in=paired_waiting_player_ids).delete()
+
+	return [
+		(chess_game.id, white_player, black_player)
+		for chess_game, (_, white_player, black_player) in zip(chess_games, pairings)
+	]
+
+@database_sync_to_async
+def async_pair_waiting_players() -> list:
+	return pair_waiting_players()
+
+class MatchmakingService:
+	def __init__(self, store=None):
+		# The players this process is holding a connection for, one FIFO per (base_time, increment_time),
+		# keyed by user id so cancelling a seek is O(1); the store, or WaitingPlayer rows without one, is what pairing claims
+		self.queues = {}
+		self.queued_time_controls = {}
+
+		self.store = store
+
+		self.pairing_task = None
+
+	def is_queued(self, user) -> bool:
+		return user.id in self.queued_time_controls
+
+	def add_to_queue(self, user, time_control: tuple[int, int]):
+		self.queues.setdefault(time_control, OrderedDict())[user.id] = user
+		self.queued_time_controls[user.id] = time_control
+
+	def remove_from_queue(self, user):
+		time_control = self.queued_time_controls.pop(user.id, None)
+
+		if time_control is None:
+			return
+
+		queue = self.queues[time_control]
+		del queue[user.id]
+
+		if not queue:
+			del self.queues[time_control]
+
+	# Queues the user for the next pairing tick
+	async def join(self, user, base_time: int, increment_time: int):
+		if self.is_queued(user):
+			return
+
+		time_control = (base_time, increment_time)
+
+		self.add_to_queue(user, time_control)
+
+		if self.store is None:
+			await async_enqueue_waiting_player(user, time_control)
+		else:
+			await self.store.add(user.id, time_control, user.rating, time.time())
+
+		if self.pairing_task is None or self.pairing_task.done():
+			self.pairing_task = asyncio.create_task(self.run_pairing_ticks())
+
+	# Runs while this process has players waiting; players queued by other processes are paired here as well
+	async def run_pairing_ticks(self):
+		while self.queued_time_controls:
+			await asyncio.sleep(MATCHMAKING_TICK)
+
+			if self.store is None:
+				pairings = await async_pair_waiting_players()
+			else:
+				pairings = await self.claim_opponents()
+
+			for game_id, white_player, black_player in pairings:
+				self.remove_from_queue(white_player)
+				self.remove_from_queue(black_player)
+
+				await self.notify_players(game_id, white_player, black_player)
+
+	# Each local player, oldest first, claims an opponent from the shared store; players another worker
+	# already paired are gone from the store and are dropped here, their match arrives through their user group
+	async def claim_opponents(self) -> list:
+		now = time.time()
+		pairings = []
+
+		for time_control, queue in list(self.queues.items()):
+			for user in list(queue.values()):
+				if not self.is_queued(user):
+					continue
+
+				if not await self.store.is_queued(user.id):
+					self.remove_from_queue(user)
+					continue
+
+				claim = await self.store.claim_opponent(user.id, now)
+
+				if claim is None:
+					continue
+
+				opponent_id, claimed_players = claim
+
+				# Both players are already off the shared queue, so without a game they go back on it for the next tick
+				try:
+					pairings.append(await async_start_chess_game(user, opponent_id, time_control))
+				except Exception:
+					logger.exception("Starting a game for players %s and %s failed, returning them to the queue", user.id, opponent_id)
+
+					await self.store.restore(claimed_players)
+
+		return pairings
+
+	async def leave(self, user):
+		self.remove_from_queue(user)
+
+		if self.store is None:
+			await self.async_remove_waiting_players([user])
+		else:
+			await self.store.remove(user.id)
+
+	async def notify_players(self, game_id, white_player, black_player):
+		channel_layer = get_channel_layer()
+
+		for player in [white_player, black_player]:
+			await channel_layer.group_send(
+				f"user_{player.id}",
+				{
+					"type": "player_matched",
+					"match_found": True,
+					"white_player": white_player.username,
+					"black_player": black_player.username,
+					"game_id": game_id,
+				}
+			)
+
+	@database_sync_to_async
+	def async_remove_waiting_players(self, users: list):
+		WaitingPlayer.objects.filter(user__in=users).delete()
+
+# Shared by every matchmaking connection in the process
+matchmaking_service = MatchmakingService(get_matchmaking_store())
@@ -0,0 +1,143 @@
+import json
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+from django.conf import settings
+
+from .rating_index import RATING_WINDOW, RATING_WINDOW_GROWTH, MAX_RATING_WINDOW
+
+# Finds the closest rated player within the user's rating window and takes both off the queue in one step, so concurrent
+# claims never retry on each other. Keys and the window are computed as in get_queue_key, get_player_key and
+# get_rating_window. Returns the opponent's id followed by each player's rating and entry, so a claim can be undone,
+# or false if nobody fits
+CLAIM_OPPONENT_SCRIPT = """
+local player_entry = redis.call("GET", KEYS[1])
+
+if not player_entry then
+	return false
+end
+
+local base_time, increment_time, joined_at = unpack(cjson.decode(player_entry))
+local queue_key = "matchmaking:queue:" .. base_time .. ":" .. increment_time
+local rating = redis.call("ZSCORE", queue_key, ARGV[1])
+
+if not rating then
+	return false
+end
+
+local max_difference = math.min(tonumber(ARGV[3]) + tonumber(ARGV[4]) * (tonumber(ARGV[2]) - joined_at), tonumber(ARGV[5]))
+
+-- Two from each side so the user themselves never crowds out the nearest opponent
+local candidates = redis.call("ZRANGEBYSCORE", queue_key, rating, rating + max_difference, "WITHSCORES", "LIMIT", 0, 2)
+
+for _, value in ipairs(redis.call("ZREVRANGEBYSCORE", queue_key, rating, rating - max_difference, "WITHSCORES", "LIMIT", 0, 2)) do
+	table.insert(candidates, value)
+end
+
+local opponent_id, opponent_rating, nearest_difference
+
+for index = 1, #candidates, 2 do
+	local member, score = candidates[index], candidates[index + 1]
+	local difference = math.abs(tonumber(score) - tonumber(rating))
+
+	if member ~= ARGV[1] and (not opponent_id or difference < nearest_difference
+		or (difference == nearest_difference and tonumber(member) < tonumber(opponent_id))) then
+		opponent_id, opponent_rating, nearest_difference = member, score, difference
+	end
+end
+
+if not opponent_id then
+	return false
+end
+
+local opponent_key = "matchmaking:player:" .. opponent_id
+local opponent_entry = redis.call("GET", opponent_key)
+
+redis.call("ZREM", queue_key, ARGV[1], opponent_id)
+redis.call("DEL", KEYS[1], opponent_key)
+
+return {opponent_id, rating, player_entry, opponent_rating, opponent_entry}
+"""
+
+def get_queue_key(time_control: tuple[int, int]) -> str:
+	base_time, increment_time = time_control
+
+	return f"matchmaking:queue:{base_time}:{increment_time}"
+
+def get_player_key(user_id: int) -> str:
+	return f"matchmaking:player:{user_id}"
+
+# Matchmaking state shared by every worker: a sorted set per time control scored by rating, and a key per player holding
+# their time control and join time. Claims run as one script, removal is a WATCH/MULTI transaction on the player's key
+class RedisMatchmakingStore:
+	def __init__(self, redis):
+		self.redis = redis
+		self.claim_opponent_script = redis.register_script(CLAIM_OPPONENT_SCRIPT)
+
+	async def is_queued(self, user_id: int) -> bool:
+		return bool(await self.redis.exists(get_player_key(user_id)))
+
+	async def add(self, user_id: int, time_control: tuple[int, int], rating: int, joined_at: float):
+		await self.remove(user_id)
+
+		async with self.redis.pipeline(transaction=True) as pipe:
+			pipe.set(get_player_key(user_id), json.dumps([*time_control, joined_at]))
+			pipe.zadd(get_queue_key(time_control), {user_id: rating})
+			await pipe.execute()
+
+	async def remove(self, user_id: int):
+		player_key = get_player_key(user_id)
+
+		async with self.redis.pipeline(transaction=True) as pipe:
+			while True:
+				try:
+					await pipe.watch(player_key)
+					player_entry = await pipe.get(player_key)
+
+					if player_entry is None:
+						return
+
+					base_time, increment_time, _ = json.loads(player_entry)
+
+					pipe.multi()
+					pipe.zrem(get_queue_key((base_time, increment_time)), user_id)
+					pipe.delete(player_key)
+					await pipe.execute()
+
+					return
+				except WatchError:
+					continue
+
+	# Takes the user and the closest rated player within their rating window off the queue together.
+	# Returns (opponent id, claimed players), or None if nobody fits or the user is no longer queued
+	async def claim_opponent(self, user_id: int, now: float):
+		claim = await self.claim_opponent_script(
+			keys=[get_player_key(user_id)],
+			args=[user_id, now, RATING_WINDOW, RATING_WINDOW_GROWTH, MAX_RATING_WINDOW]
+		)
+
+		if claim is None:
+			return None
+
+		opponent_id, rating, player_entry, opponent_rating, opponent_entry = claim
+
+		return int(opponent_id), [(user_id, rating, player_entry), (int(opponent_id), opponent_rating, opponent_entry)]
+
+	# Puts claimed players back as they were, join time included, e.g. when their game could not be created
+	async def restore(self, claimed_players: list):
+		async with self.redis.pipeline(transaction=True) as pipe:
+			for user_id, rating, player_entry in claimed_players:
+				base_time, increment_time, _ = json.loads(player_entry)
+
+				pipe.set(get_player_key(user_id), player_entry)
+				pipe.zadd(get_queue_key((base_time, increment_time)), {user_id: rating})
+
+			await pipe.execute()
+
+# Redis only when the deployment already runs it for the channel layer; otherwise matchmaking stays on WaitingPlayer rows
+def get_matchmaking_store():
+	if settings.USE_REDIS != "True":
+		return None
+
+	return RedisMatchmakingStore(Redis(host=settings.CHANNEL_HOST, port=int(settings.CHANNEL_PORT), decode_responses=True))
@@ -0,0 +1,107 @@
+from bisect import bisect_left, insort
+
+# Players are paired with the nearest rating inside a window that widens the longer they wait
+RATING_WINDOW = 100
+RATING_WINDOW_GROWTH = 10
+MAX_RATING_WINDOW = 1000
+
+def get_rating_window(waiting_seconds: float) -> float:
+	return min(RATING_WINDOW + RATING_WINDOW_GROWTH * waiting_seconds, MAX_RATING_WINDOW)
+
+# Entries are split into buckets of at most this many, so adding or removing one only shifts a short list
+BUCKET_SIZE = 512
+
+# Entries sorted by (rating, key) in buckets of parallel lists, with each bucket's last key kept in bucket_last_keys
+# so the nearest rating is two binary searches away; key must be unique per entry and orderable, e.g. a row id
+class RatingIndex:
+	def __init__(self, entries=()):
+		entries = sorted(entries, key=lambda entry: (entry[0], entry[1]))
+
+		self.bucket_keys = [
+			[(rating, key) for rating, key, _ in entries[start:start + BUCKET_SIZE]] for start in range(0, len(entries), BUCKET_SIZE)
+		]
+		self.bucket_values = [
+			[value for _, _, value in entries[start:start + BUCKET_SIZE]] for start in range(0, len(entries), BUCKET_SIZE)
+		]
+		self.bucket_last_keys = [keys[-1] for keys in self.bucket_keys]
+
+		self.length = len(entries)
+
+	def __len__(self) -> int:
+		return self.length
+
+	def add(self, rating: int, key, value):
+		self.length += 1
+
+		if not self.bucket_keys:
+			self.bucket_keys.append([(rating, key)])
+			self.bucket_values.append([value])
+			self.bucket_last_keys.append((rating, key))
+			return
+
+		bucket = min(bisect_left(self.bucket_last_keys, (rating, key)), len(self.bucket_keys) - 1)
+		keys, values = self.bucket_keys[bucket], self.bucket_values[bucket]
+
+		index = bisect_left(keys, (rating, key))
+
+		keys.insert(index, (rating, key))
+		values.insert(index, value)
+		self.bucket_last_keys[bucket] = keys[-1]
+
+		# A bucket that grew to twice the size is split in two
+		if len(keys) >= 2 * BUCKET_SIZE:
+			self.bucket_keys[bucket:bucket + 1] = [keys[:BUCKET_SIZE], keys[BUCKET_SIZE:]]
+			self.bucket_values[bucket:bucket + 1] = [values[:BUCKET_SIZE], values[BUCKET_SIZE:]]
+			self.bucket_last_keys[bucket:bucket + 1] = [keys[BUCKET_SIZE - 1], keys[-1]]
+
+	def remove(self, rating: int, key):
+		bucket = bisect_left(self.bucket_last_keys, (rating, key))
+
+		if bucket == len(self.bucket_keys):
+			raise KeyError(key)
+
+		keys, values = self.bucket_keys[bucket], self.bucket_values[bucket]
+		index = bisect_left(keys, (rating, key))
+
+		if keys[index] != (rating, key):
+			raise KeyError(key)
+
+		del keys[index]
+		del values[index]
+		self.length -= 1
+
+		if keys:
+			self.bucket_last_keys[bucket] = keys[-1]
+		else:
+			del self.bucket_keys[bucket]
+			del self.bucket_values[bucket]
+			del self.bucket_last_keys[bucket]
+
+	# The entry with the closest rating no further than max_difference away, or None; ties go to the lower rating
+	def find_nearest(self, rating: int, max_difference: float):
+		bucket = bisect_left(self.bucket_last_keys, (rating,))
+		candidates = []
+
+		# The first entry at or above rating and the one just before it, which may sit at the end of the previous bucket
+		if bucket < len(self.bucket_keys):
+			index = bisect_left(self.bucket_keys[bucket], (rating,))
+
+			if index > 0:
+				candidates.append((bucket, index - 1))
+			elif bucket > 0:
+				candidates.append((bucket - 1, len(self.bucket_keys[bucket - 1]) - 1))
+
+			candidates.append((bucket, index))
+		elif self.bucket_keys:
+			candidates.append((bucket - 1, len(self.bucket_keys[bucket - 1]) - 1))
+
+		if not candidates:
+			return None
+
+		nearest_bucket, nearest = min(candidates, key=lambda candidate: abs(self.bucket_keys[candidate[0]][candidate[1]][0] - rating))
+		nearest_rating, nearest_key = self.bucket_keys[nearest_bucket][nearest]
+
+		if abs(nearest_rating - rating) > max_difference:
+			return None
+
+		return nearest_rating, nearest_key, self.bucket_values[nearest_bucket][nearest]
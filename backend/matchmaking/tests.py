@@ -1,3 +1,548 @@
-from django.test import TestCase
+import json
+import random
+import asyncio
 
-# Create your tests here.
+from threading import Barrier, Thread
+from unittest.mock import patch
+
+from lupa.lua51 import LuaRuntime, lua_type
+from redis.exceptions import WatchError
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from gameplay.models import ChessGame
+
+from .models import WaitingPlayer
+from .rating_index import RatingIndex
+from .matchmaking_store import RedisMatchmakingStore
+from .matchmaking_service import MatchmakingService, enqueue_waiting_player, pair_waiting_players
+
+BLITZ = (180, 2)
+RAPID = (600, 0)
+
+# In-process stand-in for the few Redis commands the matchmaking store uses, with decode_responses semantics
+class FakeRedisServer:
+	def __init__(self):
+		self.data = {}
+		self.versions = {}
+
+	def touch(self, key: str):
+		self.versions[key] = self.versions.get(key, 0) + 1
+
+	def exists(self, *keys):
+		return sum(key in self.data for key in keys)
+
+	def get(self, key: str):
+		return self.data.get(key)
+
+	def set(self, key: str, value: str):
+		self.data[key] = value
+		self.touch(key)
+
+		return True
+
+	def delete(self, *keys):
+		deleted = 0
+
+		for key in keys:
+			if self.data.pop(key, None) is not None:
+				self.touch(key)
+				deleted += 1
+
+		return deleted
+
+	def zadd(self, key: str, mapping: dict):
+		sorted_set = self.data.setdefault(key, {})
+		added = sum(str(member) not in sorted_set for member in mapping)
+
+		sorted_set.update({str(member): float(score) for member, score in mapping.items()})
+		self.touch(key)
+
+		return added
+
+	def zrem(self, key: str, *members):
+		sorted_set = self.data.get(key, {})
+		removed = sum(sorted_set.pop(str(member), None) is not None for member in members)
+
+		if not sorted_set:
+			self.data.pop(key, None)
+
+		self.touch(key)
+
+		return removed
+
+	def zscore(self, key: str, member):
+		return self.data.get(key, {}).get(str(member))
+
+	def zrangebyscore(self, key: str, min_score, max_score, start=None, num=None, withscores=False, reverse=False):
+		entries = sorted(
+			((member, score) for member, score in self.data.get(key, {}).items() if min_score <= score <= max_score),
+			key=lambda entry: (entry[1], entry[0]),
+			reverse=reverse
+		)
+
+		if start is not None:
+			entries = entries[start:start + num]
+
+		return entries if withscores else [member for member, _ in entries]
+
+	def zrevrangebyscore(self, key: str, max_score, min_score, start=None, num=None, withscores=False):
+		return self.zrangebyscore(key, min_score, max_score, start, num, withscores, reverse=True)
+
+	# redis.call from a script, with arguments and replies as strings the way Redis passes them to Lua
+	def call(self, lua: LuaRuntime, command: str, key: str, *args):
+		command = command.upper()
+
+		if command == "GET":
+			return self.get(key) or False
+
+		if command == "ZSCORE":
+			score = self.zscore(key, args[0])
+			return False if score is None else f"{score:.17g}"
+
+		if command in ("ZRANGEBYSCORE", "ZREVRANGEBYSCORE"):
+			first_score, second_score, *options = [str(arg).upper() for arg in args]
+			start, num = (int(options[options.index("LIMIT") + 1]), int(options[options.index("LIMIT") + 2])) if "LIMIT" in options else (None, None)
+
+			entries = getattr(self, command.lower())(key, float(first_score), float(second_score), start, num, withscores=True)
+
+			return lua.table(*[value for member, score in entries for value in (member, f"{score:.17g}")])
+
+		if command == "ZREM":
+			return self.zrem(key, *args)
+
+		if command == "DEL":
+			return self.delete(key, *args)
+
+		raise NotImplementedError(command)
+
+# Runs a script with Redis's Lua version, all of it between two awaits so it is atomic like the real one
+class FakeScript:
+	def __init__(self, server: FakeRedisServer, script: str):
+		self.server = server
+		self.lua = LuaRuntime()
+		self.function = self.lua.eval(f"function(KEYS, ARGV, redis, cjson) {script} end")
+
+		self.redis = self.lua.table_from({"call": lambda *args: self.server.call(self.lua, *args)})
+		self.cjson = self.lua.table_from({"decode": lambda text: self.lua.table(*json.loads(text))})
+
+	async def __call__(self, keys=(), args=()):
+		await asyncio.sleep(0)
+
+		result = self.function(self.lua.table(*keys), self.lua.table(*[str(arg) for arg in args]), self.redis, self.cjson)
+
+		if result is None or result is False:
+			return None
+
+		return list(result.values()) if lua_type(result) == "table" else result
+
+# Every command yields to the event loop first, the way a network round trip would, so concurrent claims interleave
+class FakeRedis:
+	def __init__(self):
+		self.server = FakeRedisServer()
+
+	def pipeline(self, transaction=True):
+		return FakePipeline(self.server)
+
+	def register_script(self, script: str):
+		return FakeScript(self.server, script)
+
+	def __getattr__(self, name: str):
+		command = getattr(self.server, name)
+
+		async def run_command(*args, **kwargs):
+			await asyncio.sleep(0)
+			return command(*args, **kwargs)
+
+		return run_command
+
+class FakePipeline:
+	def __init__(self, server: FakeRedisServer):
+		self.server = server
+		self.reset()
+
+	def reset(self):
+		self.watched_versions = None
+		self.commands = []
+		self.is_immediate = False
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		self.reset()
+
+	async def watch(self, *keys):
+		await asyncio.sleep(0)
+
+		self.watched_versions = self.watched_versions or {}
+		self.watched_versions.update({key: self.server.versions.get(key, 0) for key in keys})
+		self.is_immediate = True
+
+	def multi(self):
+		self.is_immediate = False
+
+	async def execute(self):
+		try:
+			await asyncio.sleep(0)
+
+			for key, version in (self.watched_versions or {}).items():
+				if self.server.versions.get(key, 0) != version:
+					raise WatchError("Watched variable changed.")
+
+			return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+		finally:
+			self.reset()
+
+	def __getattr__(self, name: str):
+		command = getattr(self.server, name)
+
+		def run_command(*args, **kwargs):
+			if not self.is_immediate:
+				self.commands.append((name, args, kwargs))
+				return self
+
+			async def run_immediately():
+				await asyncio.sleep(0)
+				return command(*args, **kwargs)
+
+			return run_immediately()
+
+		return run_command
+
+class RedisMatchmakingStoreTestCase(SimpleTestCase):
+	def setUp(self):
+		self.redis = FakeRedis()
+		self.store = RedisMatchmakingStore(self.redis)
+
+	async def test_claims_nearest_rated_opponent(self):
+		await self.store.add(1, BLITZ, 1500, 0)
+		await self.store.add(2, BLITZ, 1580, 0)
+		await self.store.add(3, BLITZ, 1450, 0)
+		await self.store.add(4, RAPID, 1500, 0)
+
+		opponent_id, claimed_players = await self.store.claim_opponent(1, 0)
+
+		self.assertEqual(opponent_id, 3)
+		self.assertEqual([(user_id, float(rating)) for user_id, rating, _ in claimed_players], [(1, 1500), (3, 1450)])
+
+		self.assertFalse(await self.store.is_queued(1))
+		self.assertFalse(await self.store.is_queued(3))
+		self.assertTrue(await self.store.is_queued(2))
+		self.assertTrue(await self.store.is_queued(4))
+
+	async def test_rating_window_widens_with_waiting_time(self):
+		await self.store.add(1, BLITZ, 1500, 0)
+		await self.store.add(2, BLITZ, 1800, 0)
+
+		self.assertIsNone(await self.store.claim_opponent(1, 0))
+		self.assertTrue(await self.store.is_queued(1))
+
+		self.assertEqual((await self.store.claim_opponent(1, 30))[0], 2)
+
+	async def test_restored_players_keep_their_join_time(self):
+		await self.store.add(1, BLITZ, 1500, 0)
+		await self.store.add(2, BLITZ, 1800, 0)
+
+		_, claimed_players = await self.store.claim_opponent(1, 30)
+		await self.store.restore(claimed_players)
+
+		self.assertTrue(await self.store.is_queued(1))
+		self.assertTrue(await self.store.is_queued(2))
+		self.assertEqual((await self.store.claim_opponent(2, 30))[0], 1)
+
+	async def test_rejoining_moves_player_to_new_time_control(self):
+		await self.store.add(1, BLITZ, 1500, 0)
+		await self.store.add(1, RAPID, 1500, 0)
+		await self.store.add(2, BLITZ, 1500, 0)
+
+		self.assertIsNone(await self.store.claim_opponent(2, 0))
+
+		await self.store.remove(1)
+
+		self.assertFalse(await self.store.is_queued(1))
+		self.assertNotIn("matchmaking:queue:600:0", self.redis.server.data)
+
+	async def test_concurrent_claims_never_share_an_opponent(self):
+		user_ids = range(1, 41)
+
+		for user_id in user_ids:
+			await self.store.add(user_id, BLITZ, 1500 + user_id % 7, 0)
+
+		claims = await asyncio.gather(*(self.store.claim_opponent(user_id, 0) for user_id in user_ids))
+		opponent_ids = [claim and claim[0] for claim in claims]
+		pairs = [(user_id, opponent_id) for user_id, opponent_id in zip(user_ids, opponent_ids) if opponent_id is not None]
+		paired_ids = [user_id for pair in pairs for user_id in pair]
+
+		self.assertEqual(len(paired_ids), len(set(paired_ids)))
+		self.assertGreaterEqual(len(pairs), 1)
+
+		for user_id in user_ids:
+			self.assertEqual(await self.store.is_queued(user_id), user_id not in paired_ids)
+
+class RatingIndexTestCase(SimpleTestCase):
+	def test_finds_nearest_rating_within_window(self):
+		rating_index = RatingIndex([(1500, 1, "a"), (1620, 2, "b"), (1380, 3, "c")])
+
+		self.assertEqual(rating_index.find_nearest(1590, 100), (1620, 2, "b"))
+		self.assertEqual(rating_index.find_nearest(1400, 100), (1380, 3, "c"))
+		self.assertIsNone(rating_index.find_nearest(1900, 100))
+
+	def test_removed_entries_are_not_found(self):
+		rating_index = RatingIndex([(1500, 1, "a"), (1500, 2, "b")])
+		rating_index.remove(1500, 1)
+
+		self.assertEqual(rating_index.find_nearest(1500, 0), (1500, 2, "b"))
+		self.assertRaises(KeyError, rating_index.remove, 1500, 1)
+
+		rating_index.remove(1500, 2)
+
+		self.assertEqual(len(rating_index), 0)
+		self.assertIsNone(rating_index.find_nearest(1500, 1000))
+
+	# Small buckets so lookups cross bucket edges and buckets are split and emptied along the way
+	@patch("matchmaking.rating_index.BUCKET_SIZE", 8)
+	def test_matches_a_linear_scan_through_removals_and_additions(self):
+		rating_random = random.Random(0)
+
+		entries = {key: round(rating_random.gauss(1500, 200)) for key in range(500)}
+		rating_index = RatingIndex((rating, key, key) for key, rating in entries.items())
+
+		for step in range(2000):
+			rating = round(rating_random.gauss(1500, 200))
+			max_difference = rating_random.choice([0, 50, 400])
+
+			in_window = [(abs(entry_rating - rating), entry_rating, key) for key, entry_rating in entries.items() if abs(entry_rating - rating) <= max_difference]
+			nearest = rating_index.find_nearest(rating, max_difference)
+
+			if not in_window:
+				self.assertIsNone(nearest)
+			else:
+				self.assertEqual(abs(nearest[0] - rating), min(in_window)[0])
+
+			if nearest is not None:
+				rating_index.remove(nearest[0], nearest[1])
+				del entries[nearest[1]]
+
+			if step % 3 == 0:
+				entries[500 + step] = rating
+				rating_index.add(rating, 500 + step, 500 + step)
+
+			self.assertEqual(len(rating_index), len(entries))
+
+class PairWaitingPlayersTestCase(TransactionTestCase):
+	# Without a password, since hashing one is most of what creating a user costs and these players never log in
+	def create_users(self, count: int) -> list:
+		user_model = get_user_model()
+
+		return [
+			user_model.objects.create_user(f"player_{index}", f"player_{index}@example.com", None)
+			for index in range(count)
+		]
+
+	def test_leaves_lone_player_waiting(self):
+		user, rapid_user = self.create_users(2)
+
+		enqueue_waiting_player(user, BLITZ)
+		enqueue_waiting_player(rapid_user, RAPID)
+
+		self.assertEqual(pair_waiting_players(), [])
+		self.assertTrue(WaitingPlayer.objects.filter(user=user, base_time=180, increment_time=2).exists())
+		self.assertEqual(WaitingPlayer.objects.count(), 2)
+
+	def test_pairs_oldest_players_per_time_control_in_one_pass(self):
+		first_user, second_user, third_user, first_rapid_user, second_rapid_user = self.create_users(5)
+
+		enqueue_waiting_player(first_user, BLITZ)
+		enqueue_waiting_player(first_rapid_user, RAPID)
+		enqueue_waiting_player(second_user, BLITZ)
+		enqueue_waiting_player(third_user, BLITZ)
+		enqueue_waiting_player(second_rapid_user, RAPID)
+
+		pairings = pair_waiting_players()
+
+		self.assertEqual(len(pairings), 2)
+		self.assertEqual(ChessGame.objects.count(), 2)
+
+		for game_id, white_player, black_player in pairings:
+			chess_game = ChessGame.objects.get(id=game_id)
+
+			self.assertEqual({chess_game.white_player, chess_game.black_player}, {white_player, black_player})
+			self.assertEqual(chess_game.white_player_clock, chess_game.black_player_clock)
+
+		paired_players = [{white_player, black_player} for _, white_player, black_player in pairings]
+
+		self.assertIn({first_user, second_user}, paired_players)
+		self.assertIn({first_rapid_user, second_rapid_user}, paired_players)
+		self.assertTrue(ChessGame.objects.filter(white_player_clock=600, white_player_increment=0).exists())
+
+		self.assertEqual(list(WaitingPlayer.objects.values_list("user", flat=True)), [third_user.id])
+
+	def test_pairs_nearest_rating_within_window(self):
+		users = self.create_users(4)
+
+		for user, rating in zip(users, [1500, 2400, 1800, 1550]):
+			user.rating = rating
+			user.save(update_fields=["rating"])
+			enqueue_waiting_player(user, BLITZ)
+
+		pairings = pair_waiting_players()
+
+		self.assertEqual(len(pairings), 1)
+		self.assertEqual({pairings[0][1], pairings[0][2]}, {users[0], users[3]})
+		self.assertEqual(
+			set(WaitingPlayer.objects.values_list("user", flat=True)),
+			{users[1].id, users[2].id}
+		)
+
+	# Row locks skip what another tick holds on PostgreSQL; SQLite runs the ticks one after another on its write lock
+	def test_concurrent_ticks_never_share_a_player(self):
+		waiting_users = self.create_users(40)
+
+		for waiting_user in waiting_users:
+			enqueue_waiting_player(waiting_user, BLITZ)
+
+		workers = 8
+		start_barrier = Barrier(workers)
+		errors = []
+
+		def tick():
+			try:
+				start_barrier.wait()
+				pair_waiting_players()
+			except Exception as error:
+				errors.append(error)
+			finally:
+				connection.close()
+
+		threads = [Thread(target=tick) for _ in range(workers)]
+
+		for thread in threads:
+			thread.start()
+
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(errors, [])
+
+		player_ids = list(ChessGame.objects.values_list("white_player", flat=True))
+		player_ids += ChessGame.objects.values_list("black_player", flat=True)
+		waiting_ids = list(WaitingPlayer.objects.values_list("user", flat=True))
+
+		# Every player ends up in exactly one game or still waiting, never both and never twice
+		self.assertEqual(len(player_ids), len(set(player_ids)))
+		self.assertFalse(set(player_ids) & set(waiting_ids))
+		self.assertEqual(len(player_ids) + len(waiting_ids), len(waiting_users))
+		self.assertGreaterEqual(ChessGame.objects.count(), 1)
+
+# Seekers go through the service the way consumers do, with the real database and a fast tick
+@patch("matchmaking.matchmaking_service.MATCHMAKING_TICK", 0.01)
+class MatchmakingServiceTestCase(TransactionTestCase):
+	# Without a password, since hashing one is most of what creating a user costs and these players never log in
+	def create_users(self, count: int) -> list:
+		user_model = get_user_model()
+
+		return [
+			user_model.objects.create_user(f"player_{index}", f"player_{index}@example.com", None)
+			for index in range(count)
+		]
+
+	async def join_all(self, matchmaking_service: MatchmakingService, users: list):
+		await asyncio.gather(*(matchmaking_service.join(user, *BLITZ) for user in users))
+		await asyncio.wait_for(matchmaking_service.pairing_task, 5)
+
+	async def test_simultaneous_seekers_on_empty_pool_are_paired(self):
+		first_user, second_user = await database_sync_to_async(self.create_users)(2)
+		matchmaking_service = MatchmakingService()
+
+		await self.join_all(matchmaking_service, [first_user, second_user])
+
+		chess_game = await ChessGame.objects.select_related("white_player", "black_player").aget()
+
+		self.assertEqual({chess_game.white_player, chess_game.black_player}, {first_user, second_user})
+		self.assertFalse(await WaitingPlayer.objects.aexists())
+		self.assertEqual(matchmaking_service.queues, {})
+
+	async def test_concurrent_seekers_are_each_paired_once(self):
+		users = await database_sync_to_async(self.create_users)(20)
+		matchmaking_service = MatchmakingService()
+
+		await self.join_all(matchmaking_service, users)
+
+		player_ids = [player_id async for player_id in ChessGame.objects.values_list("white_player", flat=True)]
+		player_ids += [player_id async for player_id in ChessGame.objects.values_list("black_player", flat=True)]
+
+		self.assertEqual(sorted(player_ids), sorted(user.id for user in users))
+		self.assertFalse(await WaitingPlayer.objects.aexists())
+
+	# Two workers sharing one Redis, each holding the connection of one of the players
+	async def test_workers_pair_through_shared_store(self):
+		local_user, remote_user = await database_sync_to_async(self.create_users)(2)
+
+		redis = FakeRedis()
+		local_service = MatchmakingService(RedisMatchmakingStore(redis))
+		remote_service = MatchmakingService(RedisMatchmakingStore(redis))
+
+		channel_layer = get_channel_layer()
+		channel_name = await channel_layer.new_channel()
+		await channel_layer.group_add(f"user_{remote_user.id}", channel_name)
+
+		await remote_service.join(remote_user, *BLITZ)
+		await self.join_all(local_service, [local_user])
+
+		player_matched = await asyncio.wait_for(channel_layer.receive(channel_name), 5)
+		chess_game = await ChessGame.objects.select_related("white_player", "black_player").aget()
+
+		self.assertEqual(player_matched["game_id"], chess_game.id)
+		self.assertEqual({chess_game.white_player, chess_game.black_player}, {local_user, remote_user})
+		self.assertFalse(await WaitingPlayer.objects.aexists())
+
+		# Whichever worker made the claim, the other finds its player gone from the store and drops them
+		await asyncio.wait_for(remote_service.pairing_task, 5)
+
+		self.assertEqual(remote_service.queues, {})
+		self.assertEqual(await remote_service.claim_opponents(), [])
+		self.assertEqual(await ChessGame.objects.acount(), 1)
+
+	async def test_claim_opponents_skips_players_nobody_fits(self):
+		first_user, second_user = await database_sync_to_async(self.create_users)(2)
+		second_user.rating = 2400
+
+		matchmaking_service = MatchmakingService(RedisMatchmakingStore(FakeRedis()))
+		# A pending stand-in keeps join from starting the tick, so claims are driven by hand
+		matchmaking_service.pairing_task = asyncio.get_running_loop().create_future()
+
+		await matchmaking_service.join(first_user, *BLITZ)
+		await matchmaking_service.join(second_user, *BLITZ)
+
+		self.assertEqual(await matchmaking_service.claim_opponents(), [])
+		self.assertTrue(matchmaking_service.is_queued(first_user))
+		self.assertTrue(await matchmaking_service.store.is_queued(second_user.id))
+
+		await matchmaking_service.leave(second_user)
+
+		self.assertFalse(matchmaking_service.is_queued(second_user))
+		self.assertFalse(await matchmaking_service.store.is_queued(second_user.id))
+
+	async def test_players_are_requeued_when_their_game_cannot_be_created(self):
+		first_user, second_user = await database_sync_to_async(self.create_users)(2)
+
+		matchmaking_service = MatchmakingService(RedisMatchmakingStore(FakeRedis()))
+		matchmaking_service.pairing_task = asyncio.get_running_loop().create_future()
+
+		await matchmaking_service.join(first_user, *BLITZ)
+		await matchmaking_service.join(second_user, *BLITZ)
+
+		with patch("matchmaking.matchmaking_service.async_start_chess_game", side_effect=DatabaseError), self.assertLogs("matchmaking.matchmaking_service", "ERROR"):
+			self.assertEqual(await matchmaking_service.claim_opponents(), [])
+
+		self.assertTrue(await matchmaking_service.store.is_queued(first_user.id))
+		self.assertTrue(await matchmaking_service.store.is_queued(second_user.id))
+
+		self.assertEqual(len(await matchmaking_service.claim_opponents()), 1)
+		self.assertEqual(await ChessGame.objects.acount(), 1)
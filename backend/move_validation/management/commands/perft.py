@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from move_validation.utils.perft import PERFT_POSITIONS, STARTING_FEN, run_perft
+
+class Command(BaseCommand):
+	help = "Counts the leaf nodes of the legal move tree to a given depth"
+
+	def add_arguments(self, parser):
+		parser.add_argument("depth", type=int)
+		parser.add_argument("--fen", default=STARTING_FEN)
+		parser.add_argument("--divide", action="store_true", help="Print the leaf count below each root move")
+		parser.add_argument("--suite", action="store_true", help="Run the standard perft positions and check their known counts")
+
+	def handle(self, *args, **options):
+		depth = options["depth"]
+
+		if depth < 0:
+			raise CommandError("Depth must not be negative")
+
+		if options["suite"]:
+			self.run_suite(depth)
+			return
+
+		result = run_perft(options["fen"], depth, divide=options["divide"])
+
+		for move_name, nodes in result.divide.items():
+			self.stdout.write(f"{move_name}: {nodes}")
+
+		if result.divide:
+			self.stdout.write("")
+
+		self.stdout.write(f"Nodes: {result.nodes}")
+		self.stdout.write(f"Time: {result.seconds:.3f}s ({result.nodes_per_second:,.0f} nodes/s)")
+
+	def run_suite(self, max_depth: int):
+		failed_positions = []
+
+		for name, fen, expected_counts in PERFT_POSITIONS:
+			depth = min(max_depth, max(expected_counts))
+			result = run_perft(fen, depth)
+
+			if result.nodes == expected_counts[depth]:
+				self.stdout.write(self.style.SUCCESS(f"{name} depth {depth}: {result.nodes} ({result.nodes_per_second:,.0f} nodes/s)"))
+			else:
+				self.stdout.write(self.style.ERROR(f"{name} depth {depth}: {result.nodes}, expected {expected_counts[depth]}"))
+				failed_positions.append(name)
+
+		if failed_positions:
+			raise CommandError(f"Perft mismatch in: {', '.join(failed_positions)}")
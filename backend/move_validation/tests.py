@@ -1,3 +1,245 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .utils.perft import PERFT_POSITIONS, STARTING_FEN, run_perft
+from .utils.get_move_type import get_move_type
+from .utils.position import Position
+from .utils.moves import EN_PASSANT_CAPTURE, get_move_flags, get_uci, is_castling, is_promotion
+from .utils.zobrist import compute_zobrist_hash
+from .utils.result_detection import evaluate_game_state, get_position_occurences
+from .utils.move_validation import validate_move
+from .utils.move_generation import generate_legal_moves, get_move_from_move_info, get_move_from_uci, get_move_info
+
+# Keeps the suite quick in pure Python; deeper counts can be checked with `manage.py perft --suite`
+MAX_TEST_NODES = 100000
+
+class PerftTestCase(SimpleTestCase):
+	def test_standard_positions(self):
+		for name, fen, expected_counts in PERFT_POSITIONS:
+			for depth, expected_nodes in expected_counts.items():
+				if expected_nodes > MAX_TEST_NODES:
+					continue
+
+				with self.subTest(position=name, depth=depth):
+					self.assertEqual(run_perft(fen, depth).nodes, expected_nodes)
+
+	def test_divide_adds_up_to_total(self):
+		result = run_perft(STARTING_FEN, 3, divide=True)
+
+		self.assertEqual(len(result.divide), 20)
+		self.assertEqual(result.divide["e2e4"], 600)
+		self.assertEqual(sum(result.divide.values()), result.nodes)
+
+	def test_promotions_are_split_by_piece(self):
+		result = run_perft("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", 1, divide=True)
+
+		for promotion_move in ["b7b8q", "b7b8r", "b7b8b", "b7b8n"]:
+			self.assertIn(promotion_move, result.divide)
+
+	def test_perft_command(self):
+		output = StringIO()
+		call_command("perft", "2", "--divide", stdout=output)
+
+		self.assertIn("a2a3: 20", output.getvalue())
+		self.assertIn("Nodes: 400", output.getvalue())
+
+class MoveTypeTestCase(SimpleTestCase):
+	def test_en_passant_discovered_check(self):
+		board_placement = {
+			"4": {"piece_type": "King", "piece_color": "White", "starting_square": 4},
+			"32": {"piece_type": "Rook", "piece_color": "White", "starting_square": 0},
+			"36": {"piece_type": "Pawn", "piece_color": "White", "starting_square": 12},
+			"35": {"piece_type": "Pawn", "piece_color": "Black", "starting_square": 51},
+			"39": {"piece_type": "King", "piece_color": "Black", "starting_square": 60},
+		}
+		move_info = {
+			"piece_color": "white",
+			"piece_type": "pawn",
+			"starting_square": "36",
+			"destination_square": "43",
+			"additional_info": {}
+		}
+
+		# Capturing on d6 takes the d5 pawn off the fifth rank and opens the rook's line to the king
+		self.assertEqual(get_move_type(board_placement, 43, move_info), "check")
+
+class MoveEncodingTestCase(SimpleTestCase):
+	def get_promotion_move_info(self, promoted_piece: str) -> dict:
+		return {
+			"piece_color": "white",
+			"piece_type": "pawn",
+			"starting_square": "49",
+			"destination_square": "57",
+			"additional_info": {"promoted_piece": promoted_piece}
+		}
+
+	def test_moves_round_trip_through_move_info_and_uci(self):
+		for name, fen, _ in PERFT_POSITIONS:
+			position = Position.from_fen(fen)
+
+			for move in list(generate_legal_moves(position)):
+				with self.subTest(position=name, move=get_uci(move)):
+					self.assertEqual(get_move_from_move_info(position, get_move_info(position, move)), move)
+					self.assertEqual(get_move_from_uci(position, get_uci(move)), move)
+
+	def test_only_knight_bishop_rook_and_queen_promotions_are_valid(self):
+		position = Position.from_fen("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+
+		for promoted_piece in ["knight", "bishop", "rook", "queen"]:
+			with self.subTest(promoted_piece=promoted_piece):
+				self.assertTrue(validate_move(position, self.get_promotion_move_info(promoted_piece)))
+
+		for promoted_piece in ["king", "pawn", "dragon"]:
+			with self.subTest(promoted_piece=promoted_piece):
+				self.assertFalse(validate_move(position, self.get_promotion_move_info(promoted_piece)))
+
+		self.assertRaises(ValueError, get_move_from_move_info, position, self.get_promotion_move_info("king"))
+		self.assertRaises(ValueError, get_move_from_uci, position, "b7b8k")
+
+class ZobristTestCase(SimpleTestCase):
+	def assertHashIsCurrent(self, position: Position):
+		self.assertEqual(position.zobrist_hash, compute_zobrist_hash(position))
+
+	# Two plies deep from every perft position, which covers castling, en passant and every promotion piece
+	def test_incremental_hash_matches_full_computation_through_make_and_unmake(self):
+		seen_move_kinds = set()
+
+		for name, fen, _ in PERFT_POSITIONS:
+			position = Position.from_fen(fen)
+			root_hash = position.zobrist_hash
+
+			for move in list(generate_legal_moves(position)):
+				position.make_move(move)
+				move_hash = position.zobrist_hash
+
+				with self.subTest(position=name, move=get_uci(move)):
+					self.assertHashIsCurrent(position)
+
+				for reply in list(generate_legal_moves(position)):
+					seen_move_kinds.update(
+						kind for kind, is_kind in [
+							("castling", is_castling(reply)),
+							("en passant", get_move_flags(reply) == EN_PASSANT_CAPTURE),
+							("promotion", is_promotion(reply))
+						] if is_kind
+					)
+
+					position.make_move(reply)
+
+					with self.subTest(position=name, move=get_uci(move), reply=get_uci(reply)):
+						self.assertHashIsCurrent(position)
+
+					position.unmake_move()
+
+				self.assertEqual(position.zobrist_hash, move_hash)
+
+				position.unmake_move()
+
+			self.assertEqual(position.zobrist_hash, root_hash)
+
+		self.assertEqual(seen_move_kinds, {"castling", "en passant", "promotion"})
+
+	def test_same_position_reached_by_different_moves_has_the_same_hash(self):
+		position = Position.from_fen(STARTING_FEN)
+		starting_hash = position.zobrist_hash
+
+		for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+			position.make_move(get_move_from_uci(position, uci))
+
+		self.assertEqual(position.zobrist_hash, starting_hash)
+
+		# The same pieces with castling rights lost are a different position
+		for uci in ["e2e3", "e7e6", "e1e2", "e8e7", "e2e1", "e7e8", "e3e4", "e6e5"]:
+			position.make_move(get_move_from_uci(position, uci))
+
+		self.assertNotEqual(position.zobrist_hash, Position.from_fen("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 3").zobrist_hash)
+		self.assertHashIsCurrent(position)
+
+class RepetitionTestCase(SimpleTestCase):
+	def play(self, position: Position, position_hashes: list, uci_moves: list):
+		for uci in uci_moves:
+			position.make_move(get_move_from_uci(position, uci))
+			position_hashes.append(position.zobrist_hash)
+
+	def test_knight_shuffle_repeats_the_start_three_times(self):
+		position = Position.from_fen(STARTING_FEN)
+		position_hashes = [position.zobrist_hash]
+		knight_shuffle = ["g1f3", "g8f6", "f3g1", "f6g8"]
+
+		self.play(position, position_hashes, knight_shuffle)
+		self.assertFalse(evaluate_game_state(position, position_hashes).is_threefold_repetition)
+
+		self.play(position, position_hashes, knight_shuffle)
+		self.assertTrue(evaluate_game_state(position, position_hashes).is_threefold_repetition)
+
+	# A pawn move resets the halfmove clock, so only the positions after it are counted
+	def test_positions_before_an_irreversible_move_are_not_counted(self):
+		position = Position.from_fen(STARTING_FEN)
+		position_hashes = [position.zobrist_hash]
+
+		self.play(position, position_hashes, ["g1f3", "g8f6", "f3g1", "f6g8", "e2e3", "e7e6"])
+		self.play(position, position_hashes, ["g1f3", "g8f6", "f3g1", "f6g8"])
+
+		self.assertEqual(position.halfmove_clock, 4)
+		self.assertEqual(get_position_occurences(position_hashes, position.zobrist_hash, position.halfmove_clock), 2)
+		self.assertFalse(evaluate_game_state(position, position_hashes).is_threefold_repetition)
+
+	def test_only_hashes_inside_the_halfmove_window_are_counted(self):
+		repeated_hash, other_hash = 1, 2
+		position_hashes = [repeated_hash, other_hash, repeated_hash, other_hash, repeated_hash]
+
+		self.assertEqual(get_position_occurences(position_hashes, repeated_hash, 4), 3)
+		self.assertEqual(get_position_occurences(position_hashes, repeated_hash, 3), 2)
+		self.assertEqual(get_position_occurences(position_hashes, repeated_hash, 0), 1)
+
+class EvaluateGameStateTestCase(SimpleTestCase):
+	def evaluate(self, fen: str):
+		return evaluate_game_state(Position.from_fen(fen))
+
+	def test_checkmate(self):
+		game_state = self.evaluate("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+
+		self.assertTrue(game_state.is_check)
+		self.assertTrue(game_state.is_checkmated)
+		self.assertFalse(game_state.is_stalemated)
+
+	def test_check_with_a_way_out(self):
+		game_state = self.evaluate("rnbqkbnr/ppp2ppp/3p4/1B2p3/4P3/8/PPPP1PPP/RNBQK1NR b KQkq - 1 3")
+
+		self.assertTrue(game_state.is_check)
+		self.assertFalse(game_state.is_checkmated)
+
+	def test_stalemate(self):
+		game_state = self.evaluate("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+
+		self.assertFalse(game_state.is_check)
+		self.assertTrue(game_state.is_stalemated)
+		self.assertFalse(game_state.is_checkmated)
+
+	def test_insufficient_material(self):
+		insufficient_material_fens = [
+			"8/8/4k3/8/8/4K3/8/8 w - - 0 1",
+			"8/8/4k3/8/8/4KB2/8/8 w - - 0 1",
+			"8/8/4k3/8/8/4KN2/8/8 w - - 0 1",
+			"8/8/4kn2/8/8/4KN2/8/8 w - - 0 1"
+		]
+		sufficient_material_fens = [
+			"8/8/4k3/8/8/4KNN1/8/8 w - - 0 1",
+			"8/8/4kb2/8/8/4KB2/8/8 w - - 0 1",
+			"8/8/4k3/8/8/4KR2/8/8 w - - 0 1",
+			"8/8/4k3/8/8/4K3/4P3/8 w - - 0 1"
+		]
+
+		for fen in insufficient_material_fens:
+			with self.subTest(fen=fen):
+				self.assertTrue(self.evaluate(fen).is_insufficient_material)
+
+		for fen in sufficient_material_fens:
+			with self.subTest(fen=fen):
+				self.assertFalse(self.evaluate(fen).is_insufficient_material)
+
+	def test_fifty_move_rule(self):
+		self.assertFalse(self.evaluate("8/8/4k3/8/8/4KR2/8/8 w - - 99 80").is_fifty_move_draw)
+		self.assertTrue(self.evaluate("8/8/4k3/8/8/4KR2/8/8 w - - 100 80").is_fifty_move_draw)
@@ -0,0 +1,164 @@
+FULL_BOARD = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_8 = RANK_1 << 56
+
+NOT_FILE_A = FULL_BOARD ^ FILE_A
+NOT_FILE_H = FULL_BOARD ^ FILE_H
+NOT_FILE_AB = FULL_BOARD ^ (FILE_A | FILE_B)
+NOT_FILE_GH = FULL_BOARD ^ (FILE_G | FILE_H)
+
+SQUARE_NAMES = [str(square) for square in range(64)]
+
+# (square offset, squares a single step is allowed to land on)
+direction_step_mapping = {
+    "north": (8, FULL_BOARD),
+    "south": (-8, FULL_BOARD),
+    "east": (1, NOT_FILE_A),
+    "west": (-1, NOT_FILE_H),
+    "northeast": (9, NOT_FILE_A),
+    "northwest": (7, NOT_FILE_H),
+    "southeast": (-7, NOT_FILE_A),
+    "southwest": (-9, NOT_FILE_H),
+}
+
+offset_direction_mapping = {offset: direction for direction, (offset, _) in direction_step_mapping.items()}
+
+ORTHOGONAL_DIRECTIONS = ["north", "south", "east", "west"]
+DIAGONAL_DIRECTIONS = ["northeast", "northwest", "southeast", "southwest"]
+
+
+def shift(bitboard: int, offset: int) -> int:
+    if offset > 0:
+        return (bitboard << offset) & FULL_BOARD
+
+    return bitboard >> -offset
+
+
+def get_squares(bitboard: int) -> list[int]:
+    squares = []
+
+    while bitboard:
+        lsb = bitboard & -bitboard
+        squares.append(lsb.bit_length() - 1)
+        bitboard ^= lsb
+
+    return squares
+
+
+def build_knight_attacks(bitboard: int) -> int:
+    one_file = ((bitboard << 1) & NOT_FILE_A) | ((bitboard >> 1) & NOT_FILE_H)
+    two_files = ((bitboard << 2) & NOT_FILE_AB) | ((bitboard >> 2) & NOT_FILE_GH)
+
+    return ((one_file << 16) | (one_file >> 16) | (two_files << 8) | (two_files >> 8)) & FULL_BOARD
+
+
+def build_king_attacks(bitboard: int) -> int:
+    row = bitboard | ((bitboard << 1) & NOT_FILE_A) | ((bitboard >> 1) & NOT_FILE_H)
+
+    return (row | (row << 8) | (row >> 8)) & FULL_BOARD & ~bitboard
+
+
+def build_pawn_attacks(bitboard: int, offsets: list) -> int:
+    attacks = 0
+
+    for offset in offsets:
+        attacks |= shift(bitboard, offset) & direction_step_mapping[offset_direction_mapping[offset]][1]
+
+    return attacks
+
+
+def build_ray_squares(square: int, direction: str) -> list[int]:
+    offset, landing_mask = direction_step_mapping[direction]
+
+    ray_squares = []
+    bitboard = shift(1 << square, offset) & landing_mask
+
+    while bitboard:
+        ray_squares.append(bitboard.bit_length() - 1)
+        bitboard = shift(bitboard, offset) & landing_mask
+
+    return ray_squares
+
+
+KNIGHT_ATTACKS = [build_knight_attacks(1 << square) for square in range(64)]
+KING_ATTACKS = [build_king_attacks(1 << square) for square in range(64)]
+
+# Indexed by colour (white = 0, black = 1), then by pawn square
+PAWN_ATTACKS = [
+    [build_pawn_attacks(1 << square, [9, 7]) for square in range(64)],
+    [build_pawn_attacks(1 << square, [-7, -9]) for square in range(64)],
+]
+
+KNIGHT_TARGETS = [get_squares(attacks) for attacks in KNIGHT_ATTACKS]
+KING_TARGETS = [get_squares(attacks) for attacks in KING_ATTACKS]
+PAWN_TARGETS = [[get_squares(attacks) for attacks in color_attacks] for color_attacks in PAWN_ATTACKS]
+
+# Squares walked outwards from each square, nearest first
+RAY_SQUARES = {
+    direction: [build_ray_squares(square, direction) for square in range(64)] for direction in direction_step_mapping
+}
+
+RAYS = {
+    direction: [sum(1 << ray_square for ray_square in ray_squares) for ray_squares in direction_ray_squares]
+    for direction, direction_ray_squares in RAY_SQUARES.items()
+}
+
+
+def build_between_squares() -> list[list[int]]:
+    between_squares = [[0] * 64 for _ in range(64)]
+
+    for square in range(64):
+        for direction_ray_squares in RAY_SQUARES.values():
+            passed_squares = 0
+
+            for ray_square in direction_ray_squares[square]:
+                between_squares[square][ray_square] = passed_squares
+                passed_squares |= 1 << ray_square
+
+    return between_squares
+
+
+# Squares strictly between two squares on a shared rank, file or diagonal (0 when not aligned)
+BETWEEN = build_between_squares()
+
+# Rays whose nearest blocker is the lowest set bit vs. the highest set bit
+POSITIVE_DIAGONAL_RAYS = [RAYS["northeast"], RAYS["northwest"]]
+NEGATIVE_DIAGONAL_RAYS = [RAYS["southeast"], RAYS["southwest"]]
+POSITIVE_ORTHOGONAL_RAYS = [RAYS["north"], RAYS["east"]]
+NEGATIVE_ORTHOGONAL_RAYS = [RAYS["south"], RAYS["west"]]
+
+
+def get_ray_attacks(square: int, occupied: int, positive_rays: list, negative_rays: list) -> int:
+    attacks = 0
+
+    for rays in positive_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+
+        attacks |= ray
+
+    for rays in negative_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+
+        attacks |= ray
+
+    return attacks
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    return get_ray_attacks(square, occupied, POSITIVE_DIAGONAL_RAYS, NEGATIVE_DIAGONAL_RAYS)
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    return get_ray_attacks(square, occupied, POSITIVE_ORTHOGONAL_RAYS, NEGATIVE_ORTHOGONAL_RAYS)
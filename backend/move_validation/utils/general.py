@@ -1,6 +1,8 @@
 import math
 import copy
 
+from .attack_tables import PAWN_TARGETS, SQUARE_NAMES
+
 def get_row(square: str | int):
     return math.ceil((int(square) + 1) / 8) - 1
 
@@ -30,19 +32,9 @@ def is_on_same_diagonal(square1, square2):
 	return file_dist == rank_dist
 
 def get_pawn_attacking_squares(pawn_square, pawn_color):
-	attacking_squares = []
-	
-	if pawn_color.lower() == "black":
-		attacking_squares += [f"{int(pawn_square) - 9}", f"{int(pawn_square) - 7}"]
-	else:
-		attacking_squares += [f"{int(pawn_square) + 9}", f"{int(pawn_square) + 7}"]
-
-	cleaned_attacking_squares = copy.deepcopy(attacking_squares)
-	for attacking_square in attacking_squares:
-		if abs(get_file(pawn_square) - get_file(attacking_square)) > 1:
-			cleaned_attacking_squares.remove(attacking_square)
-
-	return cleaned_attacking_squares
+	color_index = 1 if pawn_color.lower() == "black" else 0
+
+	return [SQUARE_NAMES[attacking_square] for attacking_square in PAWN_TARGETS[color_index][int(pawn_square)]]
 
 def get_king_position(board_placement, king_color):
 	for square in board_placement.keys():
@@ -1,5 +1,7 @@
-from .get_legal_moves import is_king_in_check
-from .legal_move_helpers import update_FEN
+from .get_legal_moves import get_position
+from .position import parse_color
+from .move_generation import get_move_from_move_info
+from .moves import is_capture, is_castling, is_promotion
 from .general import *
 
 def get_is_castling(move_info: dict) -> bool:
@@ -16,20 +18,13 @@ def get_is_castling(move_info: dict) -> bool:
 	
 	return True
 
-def get_is_check(board_placement: dict, move_info: dict) -> bool:
-	starting_square = move_info["starting_square"]
-	piece_type = move_info["piece_type"]
-	piece_color = move_info["piece_color"]
-	destination_square = move_info["destination_square"]
-
-	updated_board_placement = update_FEN(board_placement, {
-		"piece_type": piece_type,
-		"piece_color": piece_color,
-		"starting_square": starting_square
-	}, destination_square, move_info["additional_info"])
+def get_is_check(board_placement: dict, move_info: dict, en_passant_target_square=None) -> bool:
+	piece_color = parse_color(move_info["piece_color"])
+	position = get_position(board_placement, piece_color, en_passant_target_square)
 
-	king_position = get_king_position(board_placement, get_opposite_color(piece_color))
-	king_in_check = is_king_in_check(updated_board_placement, get_opposite_color(piece_color))
+	position.make_move(get_move_from_move_info(position, move_info))
+	king_in_check = position.is_king_in_check(piece_color ^ 1)
+	position.unmake_move()
 
 	return king_in_check
 
@@ -73,7 +68,7 @@ def get_is_promotion(move_info) -> bool:
 	return int(destination_rank) == int(promotion_rank)
 
 def get_move_type(board_placement, en_passant_target_square, move_info) -> str:
-	is_check = get_is_check(board_placement, move_info)
+	is_check = get_is_check(board_placement, move_info, en_passant_target_square)
 	
 	if is_check:
 		return "check"
@@ -91,4 +86,20 @@ def get_move_type(board_placement, en_passant_target_square, move_info) -> str:
 	if is_capture:
 		return "capture"
 
-	return "move"
\ No newline at end of file
+	return "move"
+
+# get_move_type for an encoded move once it is known whether the move gives check
+def get_encoded_move_type(move: int, is_check: bool, move_info: dict) -> str:
+	if is_check:
+		return "check"
+
+	if is_castling(move):
+		return "castling"
+
+	if is_promotion(move):
+		return "promotion" if "promoted_piece" in (move_info.get("additional_info") or {}) else "No sound"
+
+	if is_capture(move):
+		return "capture"
+
+	return "move"
@@ -1,9 +1,8 @@
-import copy
-
 from .general import *
 
 def update_FEN(original_board_placement, starting_square_info, destination_square, additional_info: dict = {}):
-	updated_board_placement = copy.deepcopy(original_board_placement)
+	# Square entries are replaced rather than mutated, so a shallow copy is enough
+	updated_board_placement = dict(original_board_placement)
 
 	del updated_board_placement[starting_square_info["starting_square"]]
 	
@@ -0,0 +1,267 @@
+from array import array
+
+from .position import *
+
+PROMOTION_PIECE_TYPES = [QUEEN, ROOK, BISHOP, KNIGHT]
+
+CAPTURE_MOVE = CAPTURE << FLAGS_SHIFT
+
+# King starting square, king destination, squares that must be empty, squares the king passes through
+castling_info_mapping = {
+    WHITE_KINGSIDE: (4, 6, (1 << 5) | (1 << 6), (1 << 5) | (1 << 6)),
+    WHITE_QUEENSIDE: (4, 2, (1 << 1) | (1 << 2) | (1 << 3), (1 << 3) | (1 << 2)),
+    BLACK_KINGSIDE: (60, 62, (1 << 61) | (1 << 62), (1 << 61) | (1 << 62)),
+    BLACK_QUEENSIDE: (60, 58, (1 << 57) | (1 << 58) | (1 << 59), (1 << 59) | (1 << 58)),
+}
+
+castling_flags_mapping = {
+    WHITE: [WHITE_KINGSIDE, WHITE_QUEENSIDE],
+    BLACK: [BLACK_KINGSIDE, BLACK_QUEENSIDE],
+}
+
+castling_move_flags_mapping = {
+    WHITE_KINGSIDE: KINGSIDE_CASTLING,
+    WHITE_QUEENSIDE: QUEENSIDE_CASTLING,
+    BLACK_KINGSIDE: KINGSIDE_CASTLING,
+    BLACK_QUEENSIDE: QUEENSIDE_CASTLING,
+}
+
+castling_rook_starting_square_mapping = {
+    WHITE_KINGSIDE: 7,
+    WHITE_QUEENSIDE: 0,
+    BLACK_KINGSIDE: 63,
+    BLACK_QUEENSIDE: 56,
+}
+
+
+def generate_pawn_moves(from_square: int, to_square: int, flags: int):
+    move = from_square | (to_square << 6)
+
+    if to_square >= 56 or to_square < 8:
+        is_capture_move = flags == CAPTURE
+
+        for promotion in PROMOTION_PIECE_TYPES:
+            yield move | (get_promotion_flags(promotion, is_capture_move) << FLAGS_SHIFT)
+    else:
+        yield move | (flags << FLAGS_SHIFT)
+
+
+def get_target_moves(from_square: int, targets: int, enemy: int) -> list:
+    target_moves = [from_square | (to_square << 6) | CAPTURE_MOVE for to_square in get_squares(targets & enemy)]
+    target_moves += [from_square | (to_square << 6) for to_square in get_squares(targets & ~enemy)]
+
+    return target_moves
+
+
+def generate_pawn_legal_moves(position: Position, from_square: int, allowed_squares: int):
+    color = position.side_to_move
+    occupied = position.occupied
+    enemy = position.occupancy[color ^ 1]
+
+    push_offset = 8 if color == WHITE else -8
+    double_push_row = 1 if color == WHITE else 6
+
+    single_push_square = from_square + push_offset
+    if not occupied & (1 << single_push_square):
+        if allowed_squares & (1 << single_push_square):
+            yield from generate_pawn_moves(from_square, single_push_square, QUIET_MOVE)
+
+        double_push_square = single_push_square + push_offset
+        if from_square >> 3 == double_push_row and not occupied & (1 << double_push_square):
+            if allowed_squares & (1 << double_push_square):
+                yield encode_move(from_square, double_push_square, DOUBLE_PAWN_PUSH)
+
+    attacks = PAWN_ATTACKS[color][from_square]
+
+    for to_square in get_squares(attacks & enemy & allowed_squares):
+        yield from generate_pawn_moves(from_square, to_square, CAPTURE)
+
+    # En passant removes two pieces from the capturer's rank, so it is the one non-king move
+    # that pin and check masks cannot settle and is tested by playing it out instead
+    en_passant_square = position.en_passant_square
+    if en_passant_square is not None and attacks & (1 << en_passant_square):
+        captured_pawn_square = en_passant_square - push_offset
+        en_passant_move = encode_move(from_square, en_passant_square, EN_PASSANT_CAPTURE)
+
+        if position.board[captured_pawn_square] == (color ^ 1, PAWN) and is_legal_move(position, en_passant_move):
+            yield en_passant_move
+
+
+def generate_castling_legal_moves(position: Position, attacked_squares: int):
+    color = position.side_to_move
+    occupied = position.occupied
+
+    for castling_flag in castling_flags_mapping[color]:
+        if not position.castling_rights & castling_flag:
+            continue
+
+        king_square, castled_square, empty_squares, passed_squares = castling_info_mapping[castling_flag]
+        rook_square = castling_rook_starting_square_mapping[castling_flag]
+
+        if position.board[king_square] != (color, KING) or position.board[rook_square] != (color, ROOK):
+            continue
+
+        if occupied & empty_squares:
+            continue
+
+        if attacked_squares & passed_squares:
+            continue
+
+        yield encode_move(king_square, castled_square, castling_move_flags_mapping[castling_flag])
+
+
+def get_pinned_pieces(position: Position, king_square: int, color: int) -> dict:
+    opponent = color ^ 1
+    occupied = position.occupied
+    enemy_pieces = position.pieces[opponent]
+    enemy = position.occupancy[opponent]
+
+    # Enemy sliders that would attack the king if none of our pieces were in the way
+    snipers = rook_attacks(king_square, enemy) & (enemy_pieces[ROOK] | enemy_pieces[QUEEN])
+    snipers |= bishop_attacks(king_square, enemy) & (enemy_pieces[BISHOP] | enemy_pieces[QUEEN])
+
+    pin_rays = {}
+
+    for sniper_square in get_squares(snipers):
+        blockers = BETWEEN[king_square][sniper_square] & occupied
+
+        if blockers and not blockers & (blockers - 1):
+            pin_rays[get_lsb_square(blockers)] = BETWEEN[king_square][sniper_square] | (1 << sniper_square)
+
+    return pin_rays
+
+
+# Moves are produced lazily; a caller that makes a move while iterating must unmake it before resuming
+def generate_legal_moves(position: Position, from_squares: int = FULL_BOARD, check_info: CheckInfo = None):
+    color = position.side_to_move
+    own = position.occupancy[color]
+    occupied = position.occupied
+    own_pieces = position.pieces[color]
+    enemy = position.occupancy[color ^ 1]
+
+    if check_info is None:
+        check_info = position.get_check_info(color)
+
+    king_square = check_info.king_square
+    if king_square is None:
+        return
+
+    checkers = check_info.checkers
+
+    if own_pieces[KING] & from_squares:
+        yield from get_target_moves(king_square, KING_ATTACKS[king_square] & ~own & ~check_info.attacked_squares, enemy)
+
+        if not checkers:
+            yield from generate_castling_legal_moves(position, check_info.attacked_squares)
+
+    # In double check only the king can move
+    if checkers & (checkers - 1):
+        return
+
+    if checkers:
+        check_mask = checkers | BETWEEN[king_square][get_lsb_square(checkers)]
+    else:
+        check_mask = FULL_BOARD
+
+    pin_rays = get_pinned_pieces(position, king_square, color)
+    allowed_targets = ~own & check_mask
+
+    for from_square in get_squares(own_pieces[PAWN] & from_squares):
+        yield from generate_pawn_legal_moves(position, from_square, check_mask & pin_rays.get(from_square, FULL_BOARD))
+
+    for from_square in get_squares(own_pieces[KNIGHT] & from_squares):
+        # A pinned knight can never stay on its pin ray
+        if from_square in pin_rays:
+            continue
+
+        yield from get_target_moves(from_square, KNIGHT_ATTACKS[from_square] & allowed_targets, enemy)
+
+    for from_square in get_squares((own_pieces[BISHOP] | own_pieces[QUEEN]) & from_squares):
+        targets = bishop_attacks(from_square, occupied) & allowed_targets & pin_rays.get(from_square, FULL_BOARD)
+
+        yield from get_target_moves(from_square, targets, enemy)
+
+    for from_square in get_squares((own_pieces[ROOK] | own_pieces[QUEEN]) & from_squares):
+        targets = rook_attacks(from_square, occupied) & allowed_targets & pin_rays.get(from_square, FULL_BOARD)
+
+        yield from get_target_moves(from_square, targets, enemy)
+
+
+def get_position_legal_moves(position: Position, from_squares: int = FULL_BOARD, check_info: CheckInfo = None) -> array:
+    return create_move_list(generate_legal_moves(position, from_squares, check_info))
+
+
+def has_legal_move(position: Position, check_info: CheckInfo = None) -> bool:
+    for _ in generate_legal_moves(position, check_info=check_info):
+        return True
+
+    return False
+
+
+def is_legal_move(position: Position, move: int) -> bool:
+    color = position.side_to_move
+
+    position.make_move(move)
+    king_in_check = position.is_king_in_check(color)
+    position.unmake_move()
+
+    return not king_in_check
+
+
+def get_square_legal_moves(position: Position, square, check_info: CheckInfo = None) -> array:
+    return get_position_legal_moves(position, 1 << int(square), check_info)
+
+
+def get_move_from_squares(position: Position, from_square: int, to_square: int, promotion_piece_type=None) -> int:
+    color, piece_type = position.board[from_square]
+    is_capture_move = position.board[to_square] is not None
+
+    if piece_type == PAWN and (to_square >= 56 or to_square < 8):
+        flags = get_promotion_flags(QUEEN if promotion_piece_type is None else promotion_piece_type, is_capture_move)
+    elif piece_type == PAWN and to_square == position.en_passant_square and not is_capture_move:
+        flags = EN_PASSANT_CAPTURE
+    elif piece_type == PAWN and abs(to_square - from_square) == 16:
+        flags = DOUBLE_PAWN_PUSH
+    elif piece_type == KING and to_square - from_square == 2:
+        flags = KINGSIDE_CASTLING
+    elif piece_type == KING and from_square - to_square == 2:
+        flags = QUEENSIDE_CASTLING
+    else:
+        flags = CAPTURE if is_capture_move else QUIET_MOVE
+
+    return encode_move(from_square, to_square, flags)
+
+
+def get_move_from_move_info(position: Position, move_info: dict) -> int:
+    promoted_piece = (move_info.get("additional_info") or {}).get("promoted_piece")
+    promotion_piece_type = parse_piece_type(promoted_piece) if promoted_piece else None
+
+    return get_move_from_squares(position, int(move_info["starting_square"]), int(move_info["destination_square"]), promotion_piece_type)
+
+
+def get_move_from_uci(position: Position, uci: str) -> int:
+    promotion_piece_type = None
+    if len(uci) == 5:
+        promotion_piece_type = fen_piece_type_mapping[uci[4].lower()]
+
+    return get_move_from_squares(position, parse_square_name(uci[:2]), parse_square_name(uci[2:4]), promotion_piece_type)
+
+
+def get_move_info(position: Position, move: int) -> dict:
+    from_square = get_from_square(move)
+    color, piece_type = position.board[from_square]
+
+    additional_info = {}
+    promotion_piece_type = get_promotion_piece_type(move)
+
+    if promotion_piece_type is not None:
+        additional_info["promoted_piece"] = piece_type_names[promotion_piece_type].lower()
+
+    return {
+        "piece_color": color_names[color].lower(),
+        "piece_type": piece_type_names[piece_type].lower(),
+        "starting_square": str(from_square),
+        "destination_square": str(get_to_square(move)),
+        "initial_square": position.initial_squares[from_square],
+        "additional_info": additional_info
+    }
@@ -1,78 +1,29 @@
-from time import perf_counter
-
 from .general import *
-from .legal_move_helpers import *
-from .get_legal_moves import *
+from .position import Position, parse_color, parse_piece_type
+from .move_generation import generate_legal_moves, get_move_from_move_info
 
 
 def validate_move(current_fen, move_info):
-    info_fetch_time_start = perf_counter()
-    board_placement = current_fen["board_placement"]
-    castling_rights = current_fen["castling_rights"]
-    en_passant_target_square = current_fen["en_passant_target_square"]
-
-    piece_type = move_info["piece_type"].lower()
-
-    destination_square = move_info["destination_square"]
-    sliding_pieces = ["queen", "rook", "bishop"]
-
-    move_is_valid = True
-
-    info_fetch_time_end = perf_counter()
-    info_fetch_time = info_fetch_time_end - info_fetch_time_start
-    print(f"Info fetch time: {info_fetch_time:.6f}")
-
-    legal_move_generation_start = perf_counter()
-
-    if piece_type in sliding_pieces:
-        legal_moves = get_sliding_piece_legal_moves(board_placement, move_info)
-        legal_move_generation_end = perf_counter()
-        legal_move_generation_time = legal_move_generation_end - legal_move_generation_start
-        print(f"Sliding piece legal move generation time: {legal_move_generation_time:.6f}")
-
-        move_is_valid_checking_start = perf_counter()
-        move_is_valid = destination_square in legal_moves
-        move_is_valid_checking_end = perf_counter()
-        move_is_valid_checking_time = move_is_valid_checking_end - move_is_valid_checking_start
-        print(f"Is legal checking time: {move_is_valid_checking_time:.6f}")
-
-    elif piece_type == "pawn":
-        legal_moves = get_pawn_legal_moves(
-            board_placement, en_passant_target_square, move_info)
-        legal_move_generation_end = perf_counter()
-        legal_move_generation_time = legal_move_generation_end - legal_move_generation_start
-        print(f"Pawn legal move generation time: {legal_move_generation_time:.6f}")
-
-        move_is_valid_checking_start = perf_counter()
-        move_is_valid = destination_square in legal_moves
-        move_is_valid_checking_end = perf_counter()
-        move_is_valid_checking_time = move_is_valid_checking_end - move_is_valid_checking_start
-        print(f"Is legal checking time: {move_is_valid_checking_time:.6f}")
+    piece_color = parse_color(move_info["piece_color"])
+    piece_type = parse_piece_type(move_info["piece_type"])
 
-    elif piece_type == "king":
-        legal_moves = get_king_legal_moves(
-            board_placement, castling_rights, move_info)
-        legal_move_generation_end = perf_counter()
-        legal_move_generation_time = legal_move_generation_end - legal_move_generation_start
-        print(f"King legal move generation time: {legal_move_generation_time:.6f}")
+    if isinstance(current_fen, Position):
+        position = current_fen
+    else:
+        position = Position.from_parsed_fen(current_fen, move_info["piece_color"])
 
-        move_is_valid_checking_start = perf_counter()
-        move_is_valid = destination_square in legal_moves
-        move_is_valid_checking_end = perf_counter()
-        move_is_valid_checking_time = move_is_valid_checking_end - move_is_valid_checking_start
-        print(f"Is legal checking time: {move_is_valid_checking_time:.6f}")
+    if position.side_to_move != piece_color:
+        return False
 
-    elif piece_type == "knight":
-        legal_moves = get_knight_legal_moves(board_placement, move_info)
-        legal_move_generation_end = perf_counter()
-        legal_move_generation_time = legal_move_generation_end - legal_move_generation_start
-        print(f"Knight legal move generation time: {legal_move_generation_time:.6f}")
+    starting_square = int(move_info["starting_square"])
 
-        move_is_valid_checking_start = perf_counter()
-        move_is_valid = destination_square in legal_moves
-        move_is_valid_checking_end = perf_counter()
-        move_is_valid_checking_time = move_is_valid_checking_end - move_is_valid_checking_start
-        print(f"Is legal checking time: {move_is_valid_checking_time:.6f}")
+    if position.board[starting_square] != (piece_color, piece_type):
+        return False
 
-    return move_is_valid
+    # Compared with its flags so a promotion only passes with a piece a pawn can become
+    try:
+        move = get_move_from_move_info(position, move_info)
+    except (KeyError, ValueError):
+        return False
 
+    return move in generate_legal_moves(position, 1 << starting_square)
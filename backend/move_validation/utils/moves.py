@@ -0,0 +1,81 @@
+from array import array
+
+# A move is packed into 16 bits: starting square (bits 0-5), destination square (bits 6-11) and flags (bits 12-15)
+QUIET_MOVE = 0
+DOUBLE_PAWN_PUSH = 1
+KINGSIDE_CASTLING = 2
+QUEENSIDE_CASTLING = 3
+CAPTURE = 4
+EN_PASSANT_CAPTURE = 5
+# Promotion flags carry the promoted piece in their low two bits: knight, bishop, rook, queen
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+FLAGS_SHIFT = 12
+
+promotion_letters = ["n", "b", "r", "q"]
+files_list = ["a", "b", "c", "d", "e", "f", "g", "h"]
+
+
+def encode_move(from_square: int, to_square: int, flags: int = QUIET_MOVE) -> int:
+    return from_square | (to_square << 6) | (flags << FLAGS_SHIFT)
+
+
+def get_from_square(move: int) -> int:
+    return move & 63
+
+
+def get_to_square(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def get_move_flags(move: int) -> int:
+    return move >> FLAGS_SHIFT
+
+
+def is_capture(move: int) -> bool:
+    return (move >> FLAGS_SHIFT) & CAPTURE != 0
+
+
+def is_promotion(move: int) -> bool:
+    return (move >> FLAGS_SHIFT) & PROMOTION != 0
+
+
+def is_castling(move: int) -> bool:
+    return (move >> FLAGS_SHIFT) in (KINGSIDE_CASTLING, QUEENSIDE_CASTLING)
+
+
+def get_promotion_flags(promotion_piece_type: int, is_capture_move: bool = False) -> int:
+    # Piece types run knight (1) to queen (4), matching the order of the flag's low bits
+    if not 1 <= promotion_piece_type <= 4:
+        raise ValueError(f"Cannot promote to piece type {promotion_piece_type}")
+
+    return (PROMOTION_CAPTURE if is_capture_move else PROMOTION) | (promotion_piece_type - 1)
+
+
+def get_promotion_piece_type(move: int):
+    if not is_promotion(move):
+        return None
+
+    return ((move >> FLAGS_SHIFT) & 3) + 1
+
+
+def get_square_name(square: int) -> str:
+    return f"{files_list[square & 7]}{(square >> 3) + 1}"
+
+
+def parse_square_name(square_name: str) -> int:
+    return (int(square_name[1]) - 1) * 8 + files_list.index(square_name[0])
+
+
+def get_uci(move: int) -> str:
+    uci = get_square_name(move & 63) + get_square_name((move >> 6) & 63)
+
+    if is_promotion(move):
+        uci += promotion_letters[(move >> FLAGS_SHIFT) & 3]
+
+    return uci
+
+
+def create_move_list(moves=()) -> array:
+    return array("H", moves)
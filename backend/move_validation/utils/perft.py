@@ -0,0 +1,73 @@
+from time import perf_counter
+from typing import NamedTuple
+
+from .position import Position
+from .move_generation import generate_legal_moves, get_uci
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Standard positions from the Chess Programming Wiki with their known leaf counts per depth
+PERFT_POSITIONS = [
+    ("Starting position", STARTING_FEN, {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ("Position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ("Position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ("Position 4 mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1", {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ("Position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    ("Position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+]
+
+
+class PerftResult(NamedTuple):
+    nodes: int
+    seconds: float
+    # Leaf count below each root move, only filled in for divide runs
+    divide: dict
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def perft(position: Position, depth: int) -> int:
+    if depth <= 0:
+        return 1
+
+    # Bulk count the last ply instead of making each leaf move
+    if depth == 1:
+        return sum(1 for _ in generate_legal_moves(position))
+
+    nodes = 0
+
+    for move in list(generate_legal_moves(position)):
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+
+    return nodes
+
+
+def perft_divide(position: Position, depth: int) -> dict:
+    divide = {}
+
+    for move in list(generate_legal_moves(position)):
+        position.make_move(move)
+        divide[get_uci(move)] = perft(position, depth - 1)
+        position.unmake_move()
+
+    return divide
+
+
+def run_perft(fen: str, depth: int, divide=False) -> PerftResult:
+    position = Position.from_fen(fen)
+
+    start = perf_counter()
+
+    if divide and depth > 0:
+        move_counts = perft_divide(position, depth)
+        nodes = sum(move_counts.values())
+    else:
+        move_counts = {}
+        nodes = perft(position, depth)
+
+    return PerftResult(nodes, perf_counter() - start, move_counts)
@@ -0,0 +1,480 @@
+from typing import NamedTuple
+
+from .attack_tables import *
+from .zobrist import PIECE_KEYS, BLACK_TO_MOVE_KEY, get_state_key
+from .moves import *
+
+WHITE = 0
+BLACK = 1
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+color_names = ["White", "Black"]
+piece_type_names = ["Pawn", "Knight", "Bishop", "Rook", "Queen", "King"]
+
+color_name_mapping = {
+    "white": WHITE,
+    "black": BLACK,
+}
+
+piece_type_name_mapping = {
+    "pawn": PAWN,
+    "knight": KNIGHT,
+    "bishop": BISHOP,
+    "rook": ROOK,
+    "queen": QUEEN,
+    "king": KING,
+}
+
+castling_rights_mapping = {
+    "White": {
+        "Kingside": WHITE_KINGSIDE,
+        "Queenside": WHITE_QUEENSIDE,
+    },
+
+    "Black": {
+        "Kingside": BLACK_KINGSIDE,
+        "Queenside": BLACK_QUEENSIDE,
+    }
+}
+
+fen_piece_type_mapping = {
+    "p": PAWN,
+    "n": KNIGHT,
+    "b": BISHOP,
+    "r": ROOK,
+    "q": QUEEN,
+    "k": KING,
+}
+
+fen_castling_rights_mapping = {
+    "K": WHITE_KINGSIDE,
+    "Q": WHITE_QUEENSIDE,
+    "k": BLACK_KINGSIDE,
+    "q": BLACK_QUEENSIDE,
+}
+
+
+def parse_color(color) -> int:
+    if isinstance(color, int):
+        return color
+
+    return color_name_mapping[color.lower()]
+
+
+def parse_piece_type(piece_type) -> int:
+    if isinstance(piece_type, int):
+        return piece_type
+
+    return piece_type_name_mapping[piece_type.lower()]
+
+
+def get_lsb_square(bitboard: int) -> int:
+    return (bitboard & -bitboard).bit_length() - 1
+
+
+class CheckInfo(NamedTuple):
+    king_square: int | None
+    # Bitboard of the enemy pieces giving check
+    checkers: int
+    # Every square the enemy attacks, computed with the king lifted off the board
+    attacked_squares: int
+
+    @property
+    def is_in_check(self) -> bool:
+        return self.checkers != 0
+
+    @property
+    def checker_squares(self) -> list[int]:
+        return get_squares(self.checkers)
+
+
+class Position:
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+
+        # Mailbox kept alongside the bitboards so "what is on this square" stays O(1)
+        self.board = [None] * 64
+        self.initial_squares = [None] * 64
+
+        self.side_to_move = WHITE
+        self.castling_rights = 0
+        self.en_passant_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+        # Kept up to date incrementally by put_piece, remove_piece and make_move
+        self.zobrist_hash = 0
+
+        # One entry per made move, popped by unmake_move to restore the previous state exactly
+        self.undo_stack = []
+
+    @classmethod
+    def from_board_placement(cls, board_placement: dict, castling_rights: dict = None, en_passant_target_square=None, side_to_move="white", halfmove_clock=0, fullmove_number=1):
+        position = cls()
+
+        for square, square_info in board_placement.items():
+            square = int(square)
+
+            position.put_piece(square, parse_color(square_info["piece_color"]), parse_piece_type(square_info["piece_type"]))
+            position.initial_squares[square] = square_info.get("starting_square")
+
+        if castling_rights:
+            for color, sides in castling_rights_mapping.items():
+                for side, castling_flag in sides.items():
+                    if castling_rights.get(color, {}).get(side):
+                        position.castling_rights |= castling_flag
+
+        if en_passant_target_square is not None and en_passant_target_square != "":
+            position.en_passant_square = int(en_passant_target_square)
+
+        position.side_to_move = parse_color(side_to_move)
+        position.halfmove_clock = int(halfmove_clock or 0)
+        position.fullmove_number = int(fullmove_number or 1)
+
+        position.zobrist_hash ^= get_state_key(position.castling_rights, position.en_passant_square, position.side_to_move)
+
+        return position
+
+    @classmethod
+    def from_fen(cls, fen: str):
+        board_placement_string, side_to_move, castling_rights, en_passant_target_square, *move_counters = fen.split()
+        halfmove_clock, fullmove_number = (move_counters + ["0", "1"][len(move_counters):])[:2]
+
+        position = cls()
+        rank, file = 7, 0
+
+        for character in board_placement_string:
+            if character == "/":
+                rank -= 1
+                file = 0
+            elif character.isdigit():
+                file += int(character)
+            else:
+                square = rank * 8 + file
+
+                position.put_piece(square, WHITE if character.isupper() else BLACK, fen_piece_type_mapping[character.lower()])
+                position.initial_squares[square] = square
+                file += 1
+
+        for character in castling_rights.replace("-", ""):
+            position.castling_rights |= fen_castling_rights_mapping[character]
+
+        if en_passant_target_square != "-":
+            position.en_passant_square = (int(en_passant_target_square[1]) - 1) * 8 + "abcdefgh".index(en_passant_target_square[0])
+
+        position.side_to_move = WHITE if side_to_move == "w" else BLACK
+        position.halfmove_clock = int(halfmove_clock)
+        position.fullmove_number = int(fullmove_number)
+
+        position.zobrist_hash ^= get_state_key(position.castling_rights, position.en_passant_square, position.side_to_move)
+
+        return position
+
+    @classmethod
+    def from_parsed_fen(cls, parsed_fen: dict, side_to_move=None):
+        side_to_move = side_to_move or parsed_fen.get("side_to_move") or "white"
+
+        return cls.from_board_placement(
+            parsed_fen["board_placement"],
+            parsed_fen.get("castling_rights"),
+            parsed_fen.get("en_passant_target_square"),
+            side_to_move,
+            parsed_fen.get("halfmove_clock", 0),
+            parsed_fen.get("fullmove_number", 1)
+        )
+
+    def to_board_placement(self) -> dict:
+        board_placement = {}
+
+        for square in range(64):
+            piece = self.board[square]
+            if piece is None:
+                continue
+
+            color, piece_type = piece
+            initial_square = self.initial_squares[square]
+
+            board_placement[str(square)] = {
+                "piece_type": piece_type_names[piece_type],
+                "piece_color": color_names[color],
+                "starting_square": initial_square if initial_square is not None else square,
+            }
+
+        return board_placement
+
+    def to_castling_rights(self) -> dict:
+        return {
+            color: {
+                side: bool(self.castling_rights & castling_flag) for side, castling_flag in sides.items()
+            } for color, sides in castling_rights_mapping.items()
+        }
+
+    def to_parsed_fen(self) -> dict:
+        return {
+            "board_placement": self.to_board_placement(),
+            "castling_rights": self.to_castling_rights(),
+            "en_passant_target_square": self.en_passant_square,
+            "halfmove_clock": self.halfmove_clock,
+            "fullmove_number": self.fullmove_number
+        }
+
+    def copy(self):
+        position = Position.__new__(Position)
+
+        position.pieces = [self.pieces[WHITE][:], self.pieces[BLACK][:]]
+        position.occupancy = self.occupancy[:]
+        position.board = self.board[:]
+        position.initial_squares = self.initial_squares[:]
+
+        position.side_to_move = self.side_to_move
+        position.castling_rights = self.castling_rights
+        position.en_passant_square = self.en_passant_square
+        position.halfmove_clock = self.halfmove_clock
+        position.fullmove_number = self.fullmove_number
+        position.zobrist_hash = self.zobrist_hash
+        position.undo_stack = []
+
+        return position
+
+    def put_piece(self, square: int, color: int, piece_type: int):
+        square_bit = 1 << square
+
+        self.pieces[color][piece_type] |= square_bit
+        self.occupancy[color] |= square_bit
+        self.board[square] = (color, piece_type)
+        self.zobrist_hash ^= PIECE_KEYS[color][piece_type][square]
+
+    def remove_piece(self, square: int):
+        color, piece_type = self.board[square]
+        square_bit = 1 << square
+
+        self.pieces[color][piece_type] ^= square_bit
+        self.occupancy[color] ^= square_bit
+        self.board[square] = None
+        self.zobrist_hash ^= PIECE_KEYS[color][piece_type][square]
+
+    def set_side_to_move(self, color):
+        color = parse_color(color)
+
+        if color != self.side_to_move:
+            self.side_to_move = color
+            self.zobrist_hash ^= BLACK_TO_MOVE_KEY
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def get_king_square(self, color: int):
+        king_bitboard = self.pieces[color][KING]
+        if not king_bitboard:
+            return None
+
+        return get_lsb_square(king_bitboard)
+
+    def get_attackers_to(self, square: int, by_color: int, occupied: int = None) -> int:
+        if occupied is None:
+            occupied = self.occupied
+
+        attacking_pieces = self.pieces[by_color]
+
+        diagonal_attackers = attacking_pieces[BISHOP] | attacking_pieces[QUEEN]
+        orthogonal_attackers = attacking_pieces[ROOK] | attacking_pieces[QUEEN]
+
+        attackers = KNIGHT_ATTACKS[square] & attacking_pieces[KNIGHT]
+        attackers |= KING_ATTACKS[square] & attacking_pieces[KING]
+        attackers |= PAWN_ATTACKS[by_color ^ 1][square] & attacking_pieces[PAWN]
+
+        if diagonal_attackers:
+            attackers |= bishop_attacks(square, occupied) & diagonal_attackers
+
+        if orthogonal_attackers:
+            attackers |= rook_attacks(square, occupied) & orthogonal_attackers
+
+        return attackers
+
+    def is_square_attacked(self, square: int, by_color: int, occupied: int = None) -> bool:
+        return self.get_attackers_to(square, by_color, occupied) != 0
+
+    def get_check_info(self, color=None) -> CheckInfo:
+        color = self.side_to_move if color is None else parse_color(color)
+        king_square = self.get_king_square(color)
+
+        if king_square is None:
+            return CheckInfo(None, 0, self.get_attacked_squares(color ^ 1))
+
+        opponent = color ^ 1
+
+        checkers = self.get_attackers_to(king_square, opponent)
+        attacked_squares = self.get_attacked_squares(opponent, self.occupied ^ (1 << king_square))
+
+        return CheckInfo(king_square, checkers, attacked_squares)
+
+    def get_attacked_squares(self, by_color: int, occupied: int = None) -> int:
+        if occupied is None:
+            occupied = self.occupied
+
+        attacking_pieces = self.pieces[by_color]
+        attacked_squares = 0
+
+        for square in get_squares(attacking_pieces[PAWN]):
+            attacked_squares |= PAWN_ATTACKS[by_color][square]
+
+        for square in get_squares(attacking_pieces[KNIGHT]):
+            attacked_squares |= KNIGHT_ATTACKS[square]
+
+        for square in get_squares(attacking_pieces[BISHOP] | attacking_pieces[QUEEN]):
+            attacked_squares |= bishop_attacks(square, occupied)
+
+        for square in get_squares(attacking_pieces[ROOK] | attacking_pieces[QUEEN]):
+            attacked_squares |= rook_attacks(square, occupied)
+
+        for square in get_squares(attacking_pieces[KING]):
+            attacked_squares |= KING_ATTACKS[square]
+
+        return attacked_squares
+
+    def is_king_in_check(self, color=None) -> bool:
+        color = self.side_to_move if color is None else parse_color(color)
+        king_square = self.get_king_square(color)
+
+        if king_square is None:
+            return False
+
+        return self.is_square_attacked(king_square, color ^ 1)
+
+    def make_move(self, move: int):
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        flags = move >> FLAGS_SHIFT
+
+        color, piece_type = self.board[from_square]
+        initial_squares = self.initial_squares
+
+        captured_square = to_square
+        if flags == EN_PASSANT_CAPTURE:
+            captured_square = to_square - 8 if color == WHITE else to_square + 8
+
+        captured_piece = self.board[captured_square]
+
+        self.undo_stack.append((
+            move,
+            captured_piece,
+            captured_square,
+            initial_squares[captured_square],
+            self.castling_rights,
+            self.en_passant_square,
+            self.halfmove_clock,
+            self.zobrist_hash
+        ))
+
+        self.zobrist_hash ^= get_state_key(self.castling_rights, self.en_passant_square, color)
+
+        if captured_piece is not None:
+            self.remove_piece(captured_square)
+            initial_squares[captured_square] = None
+
+        self.remove_piece(from_square)
+        self.put_piece(to_square, color, (flags & 3) + 1 if flags & PROMOTION else piece_type)
+
+        initial_squares[to_square] = initial_squares[from_square]
+        initial_squares[from_square] = None
+
+        if flags == KINGSIDE_CASTLING or flags == QUEENSIDE_CASTLING:
+            rook_from_square, rook_to_square = castling_rook_squares_mapping[to_square]
+
+            self.remove_piece(rook_from_square)
+            self.put_piece(rook_to_square, color, ROOK)
+
+            initial_squares[rook_to_square] = initial_squares[rook_from_square]
+            initial_squares[rook_from_square] = None
+
+        self.castling_rights &= castling_rights_kept_mapping[from_square] & castling_rights_kept_mapping[to_square]
+
+        if flags == DOUBLE_PAWN_PUSH:
+            self.en_passant_square = (from_square + to_square) // 2
+        else:
+            self.en_passant_square = None
+
+        if piece_type == PAWN or captured_piece is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if color == BLACK:
+            self.fullmove_number += 1
+
+        self.side_to_move = color ^ 1
+
+        self.zobrist_hash ^= get_state_key(self.castling_rights, self.en_passant_square, self.side_to_move)
+
+    def unmake_move(self):
+        move, captured_piece, captured_square, captured_initial_square, castling_rights, en_passant_square, halfmove_clock, zobrist_hash = self.undo_stack.pop()
+
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        flags = move >> FLAGS_SHIFT
+
+        color, piece_type = self.board[to_square]
+        initial_squares = self.initial_squares
+
+        if flags & PROMOTION:
+            piece_type = PAWN
+
+        if flags == KINGSIDE_CASTLING or flags == QUEENSIDE_CASTLING:
+            rook_from_square, rook_to_square = castling_rook_squares_mapping[to_square]
+
+            self.remove_piece(rook_to_square)
+            self.put_piece(rook_from_square, color, ROOK)
+
+            initial_squares[rook_from_square] = initial_squares[rook_to_square]
+            initial_squares[rook_to_square] = None
+
+        self.remove_piece(to_square)
+        self.put_piece(from_square, color, piece_type)
+
+        initial_squares[from_square] = initial_squares[to_square]
+        initial_squares[to_square] = None
+
+        if captured_piece is not None:
+            self.put_piece(captured_square, captured_piece[0], captured_piece[1])
+            initial_squares[captured_square] = captured_initial_square
+
+        self.castling_rights = castling_rights
+        self.en_passant_square = en_passant_square
+        self.halfmove_clock = halfmove_clock
+        self.zobrist_hash = zobrist_hash
+
+        if color == BLACK:
+            self.fullmove_number -= 1
+
+        self.side_to_move = color
+
+
+# King destination -> (rook starting square, rook castled square)
+castling_rook_squares_mapping = {
+    6: (7, 5),
+    2: (0, 3),
+    62: (63, 61),
+    58: (56, 59),
+}
+
+# Castling rights that survive a piece moving from or to the given square
+castling_rights_kept_mapping = [WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE] * 64
+castling_rights_kept_mapping[4] ^= WHITE_KINGSIDE | WHITE_QUEENSIDE
+castling_rights_kept_mapping[7] ^= WHITE_KINGSIDE
+castling_rights_kept_mapping[0] ^= WHITE_QUEENSIDE
+castling_rights_kept_mapping[60] ^= BLACK_KINGSIDE | BLACK_QUEENSIDE
+castling_rights_kept_mapping[63] ^= BLACK_KINGSIDE
+castling_rights_kept_mapping[56] ^= BLACK_QUEENSIDE
@@ -1,120 +1,109 @@
-from .get_legal_moves import is_king_in_check, get_legal_moves
-from .general import get_all_pieces_on_board
+from typing import NamedTuple
 
-from core.utils import compare_dictionaries
+from .position import *
+from .move_generation import has_legal_move
 
-insufficient_material_configurations = [
-    ["king", "bishop", "king"],
-    ["king", "knight", "king"],
-    ["king", "knight", "king", "knight"],
-    ["king", "king"]
-]
 
-def get_is_stalemated(current_fen: dict, king_color: str) -> bool:
-    board_placement = current_fen["board_placement"]
-    castling_rights = current_fen["castling_rights"]
-    en_passant_target_square = current_fen["en_passant_target_square"]
+class GameState(NamedTuple):
+    is_check: bool
+    is_checkmated: bool
+    is_stalemated: bool
+    is_threefold_repetition: bool
+    is_fifty_move_draw: bool
+    is_insufficient_material: bool
 
-    all_legal_moves = []
+def get_result_position(current_fen, king_color) -> Position:
+    if isinstance(current_fen, Position):
+        if current_fen.side_to_move == parse_color(king_color):
+            return current_fen
 
-    king_in_check = is_king_in_check(
-        board_placement, king_color)
-    
-    if king_in_check:
-        return False
-
-    for square in board_placement.keys():
-        piece_color: str = board_placement[square]["piece_color"]
-        piece_type: str = board_placement[square]["piece_type"]
-
-        if piece_color.lower() != king_color.lower():
-            continue
-
-        move_info = {
-            "piece_color": piece_color,
-            "piece_type": piece_type,
-            "starting_square": square
-        }
-
-        all_legal_moves += get_legal_moves(
-            move_info, board_placement, en_passant_target_square, castling_rights)
+        position = current_fen.copy()
+        position.set_side_to_move(king_color)
 
-        if len(all_legal_moves) > 0:
-            return False
-
-    return True
+        return position
 
+    return Position.from_parsed_fen(current_fen, king_color)
 
-def get_is_checkmated(current_fen: dict, king_color: str) -> bool:
-    board_placement = current_fen["board_placement"]
-    castling_rights: dict = current_fen["castling_rights"]
-    en_passant_target_square: str = current_fen["en_passant_target_square"]
 
-    all_legal_moves: list = []
+def get_is_stalemated(current_fen, king_color: str, check_info: CheckInfo = None) -> bool:
+    position = get_result_position(current_fen, king_color)
+    check_info = check_info or position.get_check_info()
 
-    king_in_check: bool = is_king_in_check(
-        board_placement, king_color)
-    
-    if not king_in_check:
+    if check_info.is_in_check:
         return False
 
-    for square in board_placement.keys():
-        piece_color: str = board_placement[square]["piece_color"]
-        piece_type: str = board_placement[square]["piece_type"]
+    return not has_legal_move(position, check_info)
 
-        if piece_color.lower() != king_color.lower():
-            continue
 
-        move_info: dict = {
-            "piece_color": piece_color,
-            "piece_type": piece_type,
-            "starting_square": square
-        }
+def get_is_checkmated(current_fen, king_color: str, check_info: CheckInfo = None) -> bool:
+    position = get_result_position(current_fen, king_color)
+    check_info = check_info or position.get_check_info()
 
-        all_legal_moves += get_legal_moves(
-            move_info, board_placement, en_passant_target_square, castling_rights)
+    if not check_info.is_in_check:
+        return False
 
-        if len(all_legal_moves) > 0:
-            return False
+    return not has_legal_move(position, check_info)
 
-    return True
 
-def get_position_occurences(position_list: list, position: dict):
+def get_position_occurences(position_hashes: list, zobrist_hash: int, halfmove_clock: int):
     occurences = 0
 
-    for position_list_data in position_list:
-        position_list_fen = position_list_data["position"]
-
-        position_list_board_placement = position_list_fen["board_placement"]
-        position_list_castling_rights = position_list_fen["castling_rights"]
-        position_list_en_passant = position_list_fen["en_passant_target_square"]
+    # Nothing before the last capture or pawn move can recur, and only every other ply has the same side to move
+    earliest_index = max(len(position_hashes) - 1 - halfmove_clock, 0)
 
-        position_to_check_board_placement = position["board_placement"]
-        position_to_check_castling_rights = position["castling_rights"]
-        position_to_check_en_passant = position["en_passant_target_square"]
-
-        if not compare_dictionaries(position_list_board_placement, position_to_check_board_placement):
-            continue
-
-        if not compare_dictionaries(position_list_castling_rights, position_to_check_castling_rights):
-            continue
-
-        if not compare_dictionaries(position_list_en_passant, position_to_check_en_passant):
-            continue
-
-        occurences += 1
+    for index in range(len(position_hashes) - 1, earliest_index - 1, -2):
+        if position_hashes[index] == zobrist_hash:
+            occurences += 1
 
     return occurences
 
-def is_threefold_repetiiton(position_list: list, position: dict):
-    position_occurences = get_position_occurences(position_list, position)
+def is_threefold_repetiiton(position_hashes: list, zobrist_hash: int, halfmove_clock: int):
+    position_occurences = get_position_occurences(position_hashes, zobrist_hash, halfmove_clock)
     
     return position_occurences >= 3
 
 def check_50_move_rule_draw(halfmove_clock: int):
     return halfmove_clock >= 100
 
-def has_sufficient_material(board_placement):
-    all_pieces_on_board = get_all_pieces_on_board(board_placement)
+def has_insufficient_material(position: Position) -> bool:
+    minor_pieces_count = []
+
+    for pieces in position.pieces:
+        if pieces[PAWN] or pieces[ROOK] or pieces[QUEEN]:
+            return False
+
+        minor_pieces_count.append((pieces[BISHOP].bit_count(), pieces[KNIGHT].bit_count()))
+
+    if sum(bishops + knights for bishops, knights in minor_pieces_count) <= 1:
+        return True
 
-    return not (all_pieces_on_board in insufficient_material_configurations)
\ No newline at end of file
+    # A lone knight each
+    return minor_pieces_count == [(0, 1), (0, 1)]
+
+
+def has_sufficient_material(board_placement):
+    if isinstance(board_placement, Position):
+        return not has_insufficient_material(board_placement)
+
+    return not has_insufficient_material(Position.from_board_placement(board_placement))
+
+
+# Everything result detection needs after a move, from a single pass of move generation.
+# position_hashes are the Zobrist hashes of the game's positions so far, oldest first and ending with this one
+def evaluate_game_state(current_fen, position_hashes: list = None, side_to_move=None) -> GameState:
+    if isinstance(current_fen, Position):
+        position = get_result_position(current_fen, current_fen.side_to_move if side_to_move is None else side_to_move)
+    else:
+        position = Position.from_parsed_fen(current_fen, side_to_move)
+
+    check_info = position.get_check_info()
+    has_moves = has_legal_move(position, check_info)
+
+    return GameState(
+        is_check=check_info.is_in_check,
+        is_checkmated=check_info.is_in_check and not has_moves,
+        is_stalemated=not check_info.is_in_check and not has_moves,
+        is_threefold_repetition=is_threefold_repetiiton(position_hashes or [], position.zobrist_hash, position.halfmove_clock),
+        is_fifty_move_draw=check_50_move_rule_draw(position.halfmove_clock),
+        is_insufficient_material=has_insufficient_material(position)
+    )
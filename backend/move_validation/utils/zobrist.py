@@ -0,0 +1,45 @@
+import random
+
+# Fixed seed so hashes stored alongside a game stay valid across processes and restarts
+zobrist_random = random.Random(0x5A0B71)
+
+# Indexed by colour, then piece type, then square
+PIECE_KEYS = [[[zobrist_random.getrandbits(64) for _ in range(64)] for _ in range(6)] for _ in range(2)]
+
+# Indexed by the castling rights bitmask
+CASTLING_KEYS = [zobrist_random.getrandbits(64) for _ in range(16)]
+
+# Indexed by the file of the en passant square
+EN_PASSANT_KEYS = [zobrist_random.getrandbits(64) for _ in range(8)]
+
+BLACK_TO_MOVE_KEY = zobrist_random.getrandbits(64)
+
+
+def get_state_key(castling_rights: int, en_passant_square, side_to_move: int) -> int:
+    state_key = CASTLING_KEYS[castling_rights]
+
+    if en_passant_square is not None:
+        state_key ^= EN_PASSANT_KEYS[en_passant_square & 7]
+
+    if side_to_move:
+        state_key ^= BLACK_TO_MOVE_KEY
+
+    return state_key
+
+
+def compute_zobrist_hash(position) -> int:
+    zobrist_hash = get_state_key(position.castling_rights, position.en_passant_square, position.side_to_move)
+
+    for square, piece in enumerate(position.board):
+        if piece is None:
+            continue
+
+        color, piece_type = piece
+        zobrist_hash ^= PIECE_KEYS[color][piece_type][square]
+
+    return zobrist_hash
+
+
+def format_zobrist_hash(zobrist_hash: int) -> str:
+    # Stored as hex since JSON consumers in the browser cannot represent 64-bit integers
+    return f"{zobrist_hash:016x}"
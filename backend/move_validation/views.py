@@ -9,7 +9,7 @@ from rest_framework.permissions import IsAuthenticated
 from .utils.get_legal_moves import get_legal_moves
 from .utils.move_validation import validate_move
 from .utils.get_move_type import get_move_type
-from .utils.result_detection import get_is_checkmated, get_is_stalemated
+from .utils.result_detection import evaluate_game_state
 
 class ShowLegalMoveView(APIView):
 	permission_classes = [IsAuthenticated]
@@ -52,7 +52,7 @@ class GetIsCheckmatedView(APIView):
 		current_fen = request.data.get("current_fen")
 		king_color = request.data.get("king_color")
 
-		is_checkmated = get_is_checkmated(current_fen, king_color)
+		is_checkmated = evaluate_game_state(current_fen, side_to_move=king_color).is_checkmated
 		return Response(is_checkmated, status=status.HTTP_200_OK)
 	
 class GetIsStalematedView(APIView):
@@ -60,5 +60,5 @@ class GetIsStalematedView(APIView):
 		current_fen = request.data.get("current_fen")
 		king_color = request.data.get("king_color")
 
-		is_stalemated = get_is_stalemated(current_fen, king_color)
+		is_stalemated = evaluate_game_state(current_fen, side_to_move=king_color).is_stalemated
 		return Response(is_stalemated, status=status.HTTP_200_OK)
\ No newline at end of file
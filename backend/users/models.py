@@ -12,6 +12,8 @@ class UserAuthModel(AbstractBaseUser):
 	email_verified = models.BooleanField(blank=True, default=False)
 	email_otp = models.CharField(max_length=6, null=True, blank=True)
 
+	rating = models.IntegerField(default=1500)
+
 	USERNAME_FIELD = "email"
 
 	objects = CustomUserManager()
@@ -4,11 +4,10 @@ enum MoveMethods {
 }
 
 enum GameplayWebSocketEventTypes {
-	MOVE_MADE = "move_made",
-	TIMER_DECREMENTED = "timer_decremented",
-	TIMER_INCREMENTED = "timer_incremented",
-	POSITION_LIST_UPDATED = "position_list_updated",
-	MOVE_LIST_UPDATED = "move_list_updated",
+	MOVE_APPLIED = "move_applied",
+	GAME_SNAPSHOT = "game_snapshot",
+	CLOCK_UPDATED = "clock_updated",
+	CLOCK_SYNC = "clock_sync",
 	PLAYER_STALEMATED = "player_stalemated",
 	PLAYER_CHECKMATED = "player_checkmated",
 	THREEFOLD_REPETITION_DETECTED =  "threefold_repetition_detected",
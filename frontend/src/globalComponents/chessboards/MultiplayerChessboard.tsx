@@ -19,10 +19,10 @@ import {
 
 import {
     CheckmateEventData,
-    MoveListUpdateEventData,
-    MoveMadeEventData,
-    PositionListUpdateEventData,
-    TimerChangedEventData,
+    ClockStateEventData,
+    ClockSyncEventData,
+    GameSnapshotEventData,
+    MoveAppliedEventData,
 } from "../../interfaces/gameLogic.ts";
 
 // Utils
@@ -48,6 +48,12 @@ import useWebSocket from "../../hooks/useWebsocket.ts";
 import { getAccessToken } from "../../utils/tokenUtils.ts";
 import { websocketBaseURL } from "../../constants/urls.ts";
 import { getOppositeColor } from "../../utils/gameLogic/general.ts";
+import { getClockSyncSample, getRemainingClockTime } from "../../utils/timeUtils.ts";
+
+// Clock sync round trips made on connect; the one with the shortest round trip gives the offset
+const CLOCK_SYNC_SAMPLES = 5;
+// How often the clocks are redrawn locally between server updates, in milliseconds
+const CLOCK_DISPLAY_INTERVAL = 100;
 
 function MultiplayerChessboard({
     parsed_fen_string,
@@ -94,6 +100,12 @@ function MultiplayerChessboard({
 
     const gameWebsocketRef = useRef<WebSocket | null>(null);
     const gameWebsocketExists = useRef<boolean>(false);
+    const lastAppliedPly = useRef<OptionalValue<number>>(null);
+
+    const clockState = useRef<OptionalValue<ClockStateEventData>>(null);
+    const clockOffset = useRef<number>(0);
+    const bestRoundTripTime = useRef<OptionalValue<number>>(null);
+    const clockSyncSamplesLeft = useRef<number>(0);
 
     const chessboardStyles = {
         gridTemplateColumns: `repeat(8, ${squareSize}px`,
@@ -128,6 +140,8 @@ function MultiplayerChessboard({
                 handleOnMessage
             );
 
+            gameWebsocket.addEventListener("open", requestGameSnapshot);
+            gameWebsocket.addEventListener("open", startClockSync);
             window.addEventListener("beforeunload", handleWindowUnload);
 
             gameWebsocketRef.current = gameWebsocket;
@@ -144,6 +158,12 @@ function MultiplayerChessboard({
         };
     }, []);
 
+    useEffect(() => {
+        const clockDisplayInterval = setInterval(updateDisplayedClocks, CLOCK_DISPLAY_INTERVAL);
+
+        return () => clearInterval(clockDisplayInterval);
+    }, []);
+
     useEffect(() => {
         handleOnDrop();
     }, [draggedSquare, droppedSquare]);
@@ -160,24 +180,20 @@ function MultiplayerChessboard({
         const eventType = parsedEventData["type"];
 
         switch (eventType) {
-            case GameplayWebSocketEventTypes.MOVE_MADE:
-                makeMove(parsedEventData);
+            case GameplayWebSocketEventTypes.MOVE_APPLIED:
+                handleMoveApplied(parsedEventData);
                 break;
 
-            case GameplayWebSocketEventTypes.TIMER_DECREMENTED:
-                handleTimerChange(parsedEventData);
+            case GameplayWebSocketEventTypes.GAME_SNAPSHOT:
+                handleGameSnapshot(parsedEventData);
                 break;
 
-            case GameplayWebSocketEventTypes.TIMER_INCREMENTED:
-                handleTimerChange(parsedEventData);
+            case GameplayWebSocketEventTypes.CLOCK_UPDATED:
+                handleClockState(parsedEventData);
                 break;
 
-            case GameplayWebSocketEventTypes.POSITION_LIST_UPDATED:
-                handlePositionListUpdate(parsedEventData);
-                break;
-
-            case GameplayWebSocketEventTypes.MOVE_LIST_UPDATED:
-                handleMoveListUpdate(parsedEventData);
+            case GameplayWebSocketEventTypes.CLOCK_SYNC:
+                handleClockSync(parsedEventData);
                 break;
 
             case GameplayWebSocketEventTypes.PLAYER_CHECKMATED:
@@ -248,33 +264,120 @@ function MultiplayerChessboard({
         //     setBlackTimer(0);
         // }
 
+        handleClockState(parsedEventData);
+
         setGameEnded(true);
         setGameEndedCause("Timeout");
         setGameWinner(getOppositeColor(parsedEventData["timeout_color"]));
     }
 
-    function handleTimerChange(parsedEventData: TimerChangedEventData) {
-        const newWhitePlayerClock = parsedEventData["white_player_clock"];
-        const newBlackPlayerClock = parsedEventData["black_player_clock"];
+    function handleClockState(parsedEventData: ClockStateEventData) {
+        clockState.current = parsedEventData;
 
-        setWhiteTimer(Math.ceil(newWhitePlayerClock));
-        setBlackTimer(Math.ceil(newBlackPlayerClock));
+        updateDisplayedClocks();
     }
 
-    function handlePositionListUpdate(
-        parsedEventData: PositionListUpdateEventData
-    ) {
-        const newPositionList = parsedEventData["new_position_list"];
-        setPositionList(newPositionList);
+    // The server only sends clocks on moves, clock starts and flag falls, so the countdown in between is computed here
+    function updateDisplayedClocks() {
+        if (!clockState.current) {
+            return;
+        }
+
+        const serverNow = Date.now() + clockOffset.current;
+
+        setWhiteTimer(Math.ceil(getRemainingClockTime(clockState.current, "white", serverNow)));
+        setBlackTimer(Math.ceil(getRemainingClockTime(clockState.current, "black", serverNow)));
+    }
+
+    function startClockSync() {
+        clockSyncSamplesLeft.current = CLOCK_SYNC_SAMPLES;
+        bestRoundTripTime.current = null;
+
+        requestClockSync();
+    }
+
+    function requestClockSync() {
+        if (gameWebsocketRef.current?.readyState === WebSocket.OPEN) {
+            gameWebsocketRef.current.send(
+                JSON.stringify({ type: "clock_sync_requested", client_time: Date.now() })
+            );
+        }
+    }
+
+    function handleClockSync(parsedEventData: ClockSyncEventData) {
+        const { clockOffset: sampleClockOffset, roundTripTime } = getClockSyncSample(
+            parsedEventData["client_time"],
+            parsedEventData["server_time"],
+            Date.now()
+        );
+
+        if (bestRoundTripTime.current === null || roundTripTime < bestRoundTripTime.current) {
+            bestRoundTripTime.current = roundTripTime;
+            clockOffset.current = sampleClockOffset;
+
+            updateDisplayedClocks();
+        }
+
+        clockSyncSamplesLeft.current -= 1;
+
+        if (clockSyncSamplesLeft.current > 0) {
+            requestClockSync();
+        }
     }
 
-    function handleMoveListUpdate(parsedEventData: MoveListUpdateEventData) {
-        const newMoveList = parsedEventData["new_move_list"];
-        setMoveList(newMoveList);
+    function requestGameSnapshot() {
+        if (gameWebsocketRef.current?.readyState === WebSocket.OPEN) {
+            gameWebsocketRef.current.send(
+                JSON.stringify({ type: "snapshot_requested" })
+            );
+        }
+    }
+
+    function handleGameSnapshot(parsedEventData: GameSnapshotEventData) {
+        lastAppliedPly.current = parsedEventData["ply"];
+
+        setPositionList(parsedEventData["position_list"]);
+        setMoveList(parsedEventData["move_list"]);
+        handleClockState(parsedEventData);
     }
 
-    function makeMove(eventData: MoveMadeEventData) {
-        setPositionIndex(eventData["new_position_index"]);
+    function handleMoveApplied(eventData: MoveAppliedEventData) {
+        const ply = eventData["ply"];
+
+        // A gap means an earlier move was missed (or no snapshot has arrived yet), so fetch the full history instead
+        if (lastAppliedPly.current === null || ply !== lastAppliedPly.current + 1) {
+            requestGameSnapshot();
+            return;
+        }
+
+        lastAppliedPly.current = ply;
+
+        setPositionList((previousPositionList) => [
+            ...previousPositionList,
+            {
+                position: eventData["new_parsed_fen"],
+                last_dragged_square: eventData["last_dragged_square"],
+                last_dropped_square: eventData["last_dropped_square"],
+                move_type: eventData["move_type"],
+            },
+        ]);
+
+        setMoveList((previousMoveList) => {
+            const algebraicNotation = eventData["algebraic_notation"];
+
+            // Odd plies are white's moves and start a new move pair
+            if (ply % 2 === 1) {
+                return [...previousMoveList, [algebraicNotation]];
+            }
+
+            return [
+                ...previousMoveList.slice(0, -1),
+                [...(previousMoveList[previousMoveList.length - 1] || []), algebraicNotation],
+            ];
+        });
+
+        setPositionIndex(ply);
+        handleClockState(eventData);
 
         playAudio(eventData["move_type"]);
     }
@@ -1,39 +1,49 @@
 import { MoveInfo, ParsedFENString } from "../types/gameLogic";
 import { BasicWebSocketEventData } from "./general.ts";
 
-interface MoveMadeEventData extends BasicWebSocketEventData {
-    move_data: MoveInfo;
-    new_parsed_fen: ParsedFENString;
-    move_type: string;
-    new_position_index: number;
-}
-
-interface TimerChangedEventData extends BasicWebSocketEventData {
+// Clocks are as of server_time; the side to move keeps counting down from there while is_clock_running
+interface ClockStateEventData extends BasicWebSocketEventData {
     white_player_clock: number;
     black_player_clock: number;
+    side_to_move: string;
+    is_clock_running: boolean;
+    server_time: number;
+}
+
+interface ClockSyncEventData extends BasicWebSocketEventData {
+    client_time: number;
+    server_time: number;
 }
 
-interface PositionListUpdateEventData extends BasicWebSocketEventData {
-    new_position_list: Array<{
+interface MoveAppliedEventData extends ClockStateEventData {
+    ply: number;
+    move_data: MoveInfo;
+    move_type: string;
+    algebraic_notation: string;
+    new_parsed_fen: ParsedFENString;
+    last_dragged_square: string;
+    last_dropped_square: string;
+}
+
+interface GameSnapshotEventData extends ClockStateEventData {
+    ply: number;
+    position_list: Array<{
         position: ParsedFENString;
         last_dragged_square: string;
         last_dropped_square: string;
         move_type: string;
     }>;
+    move_list: Array<Array<string>>;
 }
 
 interface CheckmateEventData extends BasicWebSocketEventData {
     winning_color: string;
 }
 
-interface MoveListUpdateEventData extends BasicWebSocketEventData {
-	new_move_list: Array<Array<string>>
-}
-
 export type {
-    MoveMadeEventData,
-    TimerChangedEventData,
-    PositionListUpdateEventData,
+    ClockStateEventData,
+    ClockSyncEventData,
+    MoveAppliedEventData,
+    GameSnapshotEventData,
 	CheckmateEventData,
-	MoveListUpdateEventData
 };
@@ -1,6 +1,7 @@
 import { floor } from "lodash";
 import { padZero } from "./generalUtils.ts";
 import { TimeDuration, TimeControl } from "../types/gameSetup.ts";
+import { ClockStateEventData } from "../interfaces/gameLogic.ts";
 
 function convertTimeControlTime(time: number) {
 	return time / 60;
@@ -40,6 +41,26 @@ function formatTime(timeInSeconds: number): string {
 	return trimmedTimeString;
 }
 
+// NTP-style estimate, assuming the request and the reply took equally long
+function getClockSyncSample(clientSentTime: number, serverTime: number, clientReceivedTime: number) {
+	const roundTripTime = clientReceivedTime - clientSentTime;
+	const clockOffset = serverTime + roundTripTime / 2 - clientReceivedTime;
+
+	return { clockOffset, roundTripTime };
+}
+
+function getRemainingClockTime(clockState: ClockStateEventData, color: string, serverNow: number): number {
+	const clockTime = color === "white" ? clockState.white_player_clock : clockState.black_player_clock;
+
+	if (!clockState.is_clock_running || clockState.side_to_move !== color) {
+		return clockTime;
+	}
+
+	const elapsedSeconds = (serverNow - clockState.server_time) / 1000;
+
+	return Math.max(clockTime - elapsedSeconds, 0);
+}
+
 function displayTimeControl({ baseTime, increment }: TimeControl): string {
 	const baseTimeString: string = `${convertTimeControlTime(baseTime)}`;
 	const incrementString: string = increment > 0 ? `| ${increment}` : "";
@@ -49,4 +70,4 @@ function displayTimeControl({ baseTime, increment }: TimeControl): string {
 	return timeControlString;
 }
 
-export { formatTime, displayTimeControl, convertTimeControlToSeconds, convertToMilliseconds }
\ No newline at end of file
+export { formatTime, displayTimeControl, convertTimeControlToSeconds, convertToMilliseconds, getClockSyncSample, getRemainingClockTime }
\ No newline at end of file